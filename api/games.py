@@ -4,43 +4,139 @@ Endpoints:
   GET /api/games/image/[slug] - Get game image from database
   GET /api/games/history/[slug] - Get price history for a game
   GET /api/games/history/[slug]?region=BR - Get history for specific region
+  GET /api/games/history/[slug]?resolution=week&max_points=52 - Downsampled history
+  GET /api/games/stats/[slug] - Get price statistics per region
+  GET /api/games/detail/[slug] - Image, history and stats in one response
+  GET /api/games/detail/[slug]?region=BR - Detail for a specific region
+
+Connections come from a module-level pool sized by DB_POOL_MIN/DB_POOL_MAX.
+Point DATABASE_URL at a local Postgres to run it outside Vercel.
+
+Prices (DECIMAL columns) are JSON numbers and dates are ISO strings on every
+endpoint, so detail's embedded history/stats match /history and /stats.
 """
+from decimal import Decimal
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import threading
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from urllib.parse import urlparse, parse_qs
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-def get_connection():
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+# Pool no nível do módulo: sobrevive entre invocações "quentes" da mesma
+# instância serverless, então só a primeira paga TCP + TLS + auth no Neon.
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '4'))
+# Conexão parada há mais que isso recebe um SELECT 1 antes de ser usada
+# (o Neon derruba conexões ociosas quando suspende o compute)
+DB_HEALTHCHECK_SECONDS = float(os.getenv('DB_HEALTHCHECK_SECONDS', '60'))
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_last_used = {}
+
+def json_default(value):
+    """DECIMAL vira número, como no json_agg do detail; o resto (datas) vira str"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def get_pool():
+    global _pool
+    if _pool is None or _pool.closed:
+        with _pool_lock:
+            if _pool is None or _pool.closed:
+                _pool = ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    DATABASE_URL,
+                    cursor_factory=RealDictCursor,
+                    connect_timeout=DB_CONNECT_TIMEOUT,
+                    keepalives=1,
+                    keepalives_idle=30,
+                )
+    return _pool
+
+def _checkout(pool):
+    """Pega uma conexão do pool, descartando as mortas ou que falham no ping."""
+    for _ in range(DB_POOL_MAX + 1):
+        conn = pool.getconn()
+        if not conn.closed:
+            last_used = _last_used.get(id(conn))
+            # Conexão recém-aberta ou usada há pouco: confia sem ping
+            if last_used is None or time.monotonic() - last_used < DB_HEALTHCHECK_SECONDS:
+                return conn
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return conn
+            except psycopg2.Error:
+                pass
+        _last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError('no healthy database connection available')
+
+def query(sql, params=(), fetch='all'):
+    """Executa uma consulta de leitura com uma conexão do pool.
+
+    Em autocommit não há BEGIN/COMMIT, então a consulta custa um único
+    round-trip. Se a conexão cair no meio, ela é descartada e a consulta
+    é repetida uma vez numa conexão nova.
+    """
+    pool = get_pool()
+    for attempt in (1, 2):
+        conn = _checkout(pool)
+        broken = False
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchone() if fetch == 'one' else cursor.fetchall()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            if attempt == 2:
+                raise
+        finally:
+            if broken or conn.closed:
+                _last_used.pop(id(conn), None)
+                pool.putconn(conn, close=True)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+                pool.putconn(conn)
 
 def get_game_image(slug):
     """Get game cover image URL"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    return query("""
         SELECT slug, image_url
         FROM game_images
         WHERE slug = %s
-    """, (slug,))
+    """, (slug,), fetch='one')
 
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+# Reamostragem do histórico: cada região vira no máximo max_points pontos,
+# não importa quantos dias de histórico existam
+HISTORY_RESOLUTIONS = ('day', 'week', 'month')
+HISTORY_MAX_POINTS = 365
+HISTORY_MAX_POINTS_LIMIT = 2000
 
-    return result
+def history_ctes(region=None):
+    """CTEs history (linhas cruas) e points (histórico agregado em baldes).
 
-def get_price_history(slug, region=None):
-    """Get price history for a game (for charts)"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    if region:
-        cursor.execute("""
+    Cada linha é truncada para a resolução (date_trunc) e os períodos de
+    cada região são numerados (dense_rank). Se houver mais períodos que
+    max_points, grupos de width períodos consecutivos viram um balde, e o
+    balde é rotulado pelo seu primeiro período, sempre um início de
+    dia/semana/mês. Cada ponto traz os valores do último dia do balde, mais
+    o mínimo e o máximo de price_brl dentro dele.
+    """
+    region_filter = "AND region_code = %(region)s" if region else ""
+    return """
+        history AS (
             SELECT
                 recorded_at,
                 region_code,
@@ -49,58 +145,129 @@ def get_price_history(slug, region=None):
                 sale_price,
                 price_brl,
                 discount_percent,
-                on_sale
+                on_sale,
+                date_trunc(%(resolution)s, recorded_at::timestamp)::date as period
             FROM price_history
-            WHERE slug = %s AND region_code = %s
-            ORDER BY recorded_at ASC
-        """, (slug, region))
-    else:
-        cursor.execute("""
+            WHERE slug = %(slug)s """ + region_filter + """
+        ),
+        periods AS (
+            SELECT
+                history.*,
+                dense_rank() OVER (PARTITION BY region_code ORDER BY period) as period_rank
+            FROM history
+        ),
+        spans AS (
             SELECT
-                recorded_at,
                 region_code,
-                currency,
-                msrp,
-                sale_price,
-                price_brl,
-                discount_percent,
-                on_sale
-            FROM price_history
-            WHERE slug = %s
-            ORDER BY recorded_at ASC, price_brl ASC
-        """, (slug,))
+                GREATEST(1, CEIL(MAX(period_rank)::numeric / %(max_points)s))::int as width
+            FROM periods
+            GROUP BY region_code
+        ),
+        points AS (
+            SELECT
+                MIN(p.period) as recorded_at,
+                p.region_code,
+                (array_agg(p.currency ORDER BY p.recorded_at DESC))[1] as currency,
+                (array_agg(p.msrp ORDER BY p.recorded_at DESC))[1] as msrp,
+                (array_agg(p.sale_price ORDER BY p.recorded_at DESC))[1] as sale_price,
+                (array_agg(p.price_brl ORDER BY p.recorded_at DESC))[1] as price_brl,
+                (array_agg(p.discount_percent ORDER BY p.recorded_at DESC))[1] as discount_percent,
+                (array_agg(p.on_sale ORDER BY p.recorded_at DESC))[1] as on_sale,
+                MIN(p.price_brl) as min_price_brl,
+                MAX(p.price_brl) as max_price_brl,
+                COUNT(*) as samples
+            FROM periods p
+            JOIN spans s ON s.region_code = p.region_code
+            GROUP BY p.region_code, (p.period_rank - 1) / s.width
+        )
+    """
 
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
+def history_params(slug, region=None, resolution=None, max_points=None):
+    """Valida resolution/max_points e monta os parâmetros das CTEs"""
+    resolution = resolution or 'day'
+    if resolution not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"resolution must be one of: {', '.join(HISTORY_RESOLUTIONS)}")
+    try:
+        max_points = HISTORY_MAX_POINTS if max_points in (None, '') else int(max_points)
+    except ValueError:
+        max_points = 0
+    if not 1 <= max_points <= HISTORY_MAX_POINTS_LIMIT:
+        raise ValueError(f"max_points must be between 1 and {HISTORY_MAX_POINTS_LIMIT}")
+    return {'slug': slug, 'region': region, 'resolution': resolution, 'max_points': max_points}
 
-    return results
+def get_price_history(slug, region=None, resolution=None, max_points=None):
+    """Get price history for a game (for charts), bucketed per region"""
+    params = history_params(slug, region, resolution, max_points)
+    return query(
+        "WITH " + history_ctes(region) + """
+        SELECT *
+        FROM points
+        ORDER BY recorded_at ASC, price_brl ASC
+        """,
+        params,
+    )
 
 def get_price_stats(slug):
-    """Get price statistics for a game"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    """Get price statistics for a game (materialized per region)"""
+    return query("""
         SELECT
             region_code,
-            MIN(price_brl) as min_price,
-            MAX(price_brl) as max_price,
-            AVG(price_brl)::DECIMAL(10,2) as avg_price,
-            MIN(recorded_at) as first_date,
-            MAX(recorded_at) as last_date,
-            COUNT(*) as records
-        FROM price_history
+            min_price_brl as min_price,
+            max_price_brl as max_price,
+            avg_price_brl as avg_price,
+            first_recorded as first_date,
+            last_recorded as last_date,
+            records,
+            current_price_brl as current_price,
+            current_since,
+            days_at_current_price
+        FROM game_price_stats
         WHERE slug = %s
-        GROUP BY region_code
         ORDER BY min_price ASC
     """, (slug,))
 
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
+def get_game_detail(slug, region=None, resolution=None, max_points=None):
+    """Image, price history and stats for the detail page in one query"""
+    params = history_params(slug, region, resolution, max_points)
+    row = query(
+        "WITH " + history_ctes(region) + """,
+        stats AS (
+            SELECT
+                region_code,
+                min_price_brl as min_price,
+                max_price_brl as max_price,
+                avg_price_brl as avg_price,
+                first_recorded as first_date,
+                last_recorded as last_date,
+                records,
+                current_price_brl as current_price,
+                current_since,
+                days_at_current_price
+            FROM game_price_stats
+            WHERE slug = %(slug)s """ + ("AND region_code = %(region)s" if region else "") + """
+        )
+        SELECT
+            (SELECT image_url FROM game_images WHERE slug = %(slug)s) as image_url,
+            COALESCE(
+                (SELECT json_agg(p ORDER BY p.recorded_at, p.price_brl) FROM points p),
+                '[]'::json
+            ) as history,
+            COALESCE(
+                (SELECT json_agg(s ORDER BY s.min_price) FROM stats s),
+                '[]'::json
+            ) as stats
+        """,
+        params,
+        fetch='one',
+    )
 
-    return results
+    return {
+        'slug': slug,
+        'region': region,
+        'image_url': row['image_url'],
+        'history': row['history'],
+        'stats': row['stats'],
+    }
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -122,7 +289,7 @@ class handler(BaseHTTPRequestHandler):
                 slug = path_parts[3]
                 result = get_game_image(slug)
                 if result:
-                    self.wfile.write(json.dumps(result, default=str).encode())
+                    self.wfile.write(json.dumps(result, default=json_default).encode())
                 else:
                     self.wfile.write(json.dumps({'error': 'Image not found'}).encode())
 
@@ -130,14 +297,31 @@ class handler(BaseHTTPRequestHandler):
             elif len(path_parts) >= 4 and path_parts[2] == 'history':
                 slug = path_parts[3]
                 region = params.get('region', [None])[0]
-                result = get_price_history(slug, region)
-                self.wfile.write(json.dumps(result, default=str).encode())
+                result = get_price_history(
+                    slug,
+                    region,
+                    params.get('resolution', [None])[0],
+                    params.get('max_points', [None])[0],
+                )
+                self.wfile.write(json.dumps(result, default=json_default).encode())
+
+            # Route: /api/games/detail/[slug]
+            elif len(path_parts) >= 4 and path_parts[2] == 'detail':
+                slug = path_parts[3]
+                region = params.get('region', [None])[0]
+                result = get_game_detail(
+                    slug,
+                    region,
+                    params.get('resolution', [None])[0],
+                    params.get('max_points', [None])[0],
+                )
+                self.wfile.write(json.dumps(result, default=json_default).encode())
 
             # Route: /api/games/stats/[slug]
             elif len(path_parts) >= 4 and path_parts[2] == 'stats':
                 slug = path_parts[3]
                 result = get_price_stats(slug)
-                self.wfile.write(json.dumps(result, default=str).encode())
+                self.wfile.write(json.dumps(result, default=json_default).encode())
 
             else:
                 self.wfile.write(json.dumps({
@@ -145,7 +329,10 @@ class handler(BaseHTTPRequestHandler):
                         '/api/games/image/[slug]',
                         '/api/games/history/[slug]',
                         '/api/games/history/[slug]?region=BR',
-                        '/api/games/stats/[slug]'
+                        '/api/games/history/[slug]?resolution=week&max_points=52',
+                        '/api/games/stats/[slug]',
+                        '/api/games/detail/[slug]',
+                        '/api/games/detail/[slug]?region=BR'
                     ]
                 }).encode())
 
@@ -1,7 +1,7 @@
 """
 API simples para servir dados dos jogos Nintendo
 """
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -9,28 +9,64 @@ from pathlib import Path
 # Adicionar o diretório backend ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from providers.nintendo_extended_data import get_all_games_with_prices
+from urllib.parse import parse_qs, urlparse
+
+from api.catalog import CatalogCache
+from api.metrics import MeteredHandler, RequestMetrics, metric
+from api.responses import CachedResponse, cache_key, send_cached
+from api.serving import DEFAULT_MODE, DEFAULT_WORKERS, add_serving_arguments, serve
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+]
+
+class GameAPIHandler(MeteredHandler):
+    catalogs = CatalogCache()
+    metrics = RequestMetrics(['/api/nintendo/games', '/api/metrics'])
 
-class GameAPIHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        # CORS headers
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self._metered(self._get)
 
-        if self.path == '/api/nintendo/games':
-            # Buscar todos os jogos
-            games = get_all_games_with_prices(
-                regions=["US", "BR", "GB", "DE", "FR", "JP", "MX", "AR"]
-            )
+    def _get(self):
+        parsed = urlparse(self.path)
 
-            # Converter para formato JSON
-            self.wfile.write(json.dumps(games, ensure_ascii=False).encode('utf-8'))
-        else:
-            self.wfile.write(json.dumps({"error": "Not found"}).encode('utf-8'))
+        if parsed.path == '/api/metrics':
+            self._send_metrics(metric(
+                'api_catalog_load_seconds', 'gauge', 'Duration of the last catalog build.',
+                [({}, self.catalogs.load_seconds)],
+            ))
+            return
+
+        if parsed.path != '/api/nintendo/games':
+            body = json.dumps({"error": "Not found"}).encode('utf-8')
+            self.send_response(404)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in CORS_HEADERS:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # Catálogo montado uma vez; cada combinação de filtros é serializada
+        # só na primeira vez e depois sai do cache do snapshot
+        catalog = self.catalogs.get()
+        key = cache_key(parsed.path, parsed.query)
+        cached = catalog.responses.get(key)
+        self.metrics.count_cache(cached is not None)
+        if cached is None:
+            params = parse_qs(parsed.query)
+            games = catalog.filter(
+                region=params.get('region', [None])[0],
+                genre=params.get('genre', [None])[0],
+                publisher=params.get('publisher', [None])[0],
+                on_sale=params.get('on_sale', [None])[0] in ('1', 'true'),
+            )
+            body = json.dumps(games, ensure_ascii=False).encode('utf-8')
+            cached = catalog.responses.put(key, CachedResponse(200, body, catalog.last_modified))
+        send_cached(self, cached, CORS_HEADERS)
 
     def do_OPTIONS(self):
         self.send_response(200)
@@ -43,16 +79,18 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         # Silenciar logs do servidor
         pass
 
-def run_server(port=8000):
-    server = HTTPServer(('localhost', port), GameAPIHandler)
-    print(f"Servidor rodando em http://localhost:{port}")
+def run_server(port=8000, mode=DEFAULT_MODE, workers=DEFAULT_WORKERS, processes=1):
+    # Monta o catálogo antes de abrir a porta (no prefork, herdado pelos filhos)
+    GameAPIHandler.catalogs.get()
+    print(f"Servidor rodando em http://localhost:{port} ({mode})")
     print(f"API disponível em: http://localhost:{port}/api/nintendo/games")
     print("Pressione Ctrl+C para parar")
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\nServidor encerrado")
-        server.shutdown()
+    serve(GameAPIHandler, 'localhost', port, mode, workers, processes)
+    print("\nServidor encerrado")
 
 if __name__ == '__main__':
-    run_server()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8000)
+    add_serving_arguments(parser)
+    args = parser.parse_args()
+    run_server(args.port, args.mode, args.workers, args.processes)
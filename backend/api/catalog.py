@@ -0,0 +1,110 @@
+"""
+Catálogo estático de providers/nintendo_extended_data.py servido pelo api.py
+
+O payload é montado uma vez e só de novo quando o arquivo do módulo muda
+(o módulo é recarregado). Filtros usam índices feitos na mesma carga, e as
+respostas serializadas ficam num ResponseCache do snapshot.
+"""
+import importlib
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from api.responses import ResponseCache, http_date
+
+CATALOG_MODULE = "providers.nintendo_extended_data"
+CATALOG_REGIONS = ["US", "BR", "GB", "DE", "FR", "JP", "MX", "AR"]
+
+# Filtros de igualdade aceitos na query (comparação sem diferenciar caixa)
+CATALOG_FIELDS = ("region", "genre", "publisher")
+
+
+class Catalog:
+    """Snapshot imutável do catálogo com índices por região/gênero/publisher."""
+
+    def __init__(self, items: List[dict], loaded_at: float):
+        self.items = items
+        self.loaded_at = loaded_at
+        self.last_modified = http_date(None, loaded_at)
+        self.responses = ResponseCache()
+
+        self.by_field: Dict[str, Dict[str, List[int]]] = {field: {} for field in CATALOG_FIELDS}
+        self.on_sale: List[int] = []
+        for position, item in enumerate(items):
+            for field in CATALOG_FIELDS:
+                value = str(item.get(field) or "").lower()
+                self.by_field[field].setdefault(value, []).append(position)
+            if (item.get("discount_percent") or 0) > 0:
+                self.on_sale.append(position)
+
+    def filter(
+        self,
+        region: Optional[str] = None,
+        genre: Optional[str] = None,
+        publisher: Optional[str] = None,
+        on_sale: bool = False,
+    ) -> List[dict]:
+        requested = {"region": region, "genre": genre, "publisher": publisher}
+        lists = [
+            self.by_field[field].get(value.lower(), [])
+            for field, value in requested.items()
+            if value
+        ]
+        if on_sale:
+            lists.append(self.on_sale)
+        if not lists:
+            return self.items
+
+        # Começa pelo menor índice e confere o resto por conjunto
+        lists.sort(key=len)
+        positions = lists[0]
+        for other in lists[1:]:
+            allowed = set(other)
+            positions = [position for position in positions if position in allowed]
+        return [self.items[position] for position in positions]
+
+
+class CatalogCache:
+    """Mantém o Catalog atual e o refaz quando o arquivo do módulo muda."""
+
+    def __init__(self, module_name: str = CATALOG_MODULE, regions: List[str] = CATALOG_REGIONS):
+        self.module_name = module_name
+        self.regions = regions
+        self.load_seconds = 0.0
+        self._current: Optional[Catalog] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        if self._module is None:
+            return None
+        try:
+            stat = Path(self._module.__file__).stat()
+        except (OSError, TypeError):
+            return self._stat
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self) -> Catalog:
+        current = self._current
+        if current is not None and self._file_stat() == self._stat:
+            return current
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos
+            if self._current is None or self._file_stat() != self._stat:
+                self._load()
+        return self._current
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        # Import tardio: a base estática só é carregada quando o catálogo é pedido
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+        else:
+            self._module = importlib.reload(self._module)
+        stat = self._file_stat()
+        items = self._module.get_all_games_with_prices(regions=self.regions)
+        self._current = Catalog(items, time.time())
+        self._stat = stat
+        self.load_seconds = time.perf_counter() - started
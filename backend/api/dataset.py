@@ -0,0 +1,271 @@
+import hashlib
+import heapq
+import json
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from api.responses import ResponseCache, http_date
+from api.search import SearchIndex
+
+# Campos com índice de igualdade (valor -> posições em items)
+INDEXED_FIELDS = ("store", "region", "platform")
+
+# Ordenações pré-calculadas na carga. discount já vem do maior para o menor
+# (melhores ofertas primeiro); um "-" na frente do nome inverte qualquer uma.
+SORT_KEYS: Dict[str, Callable[[dict], tuple]] = {
+    "price": lambda item: (item.get("price") is None, item.get("price") or 0),
+    "discount": lambda item: (-(item.get("discount_percent") or 0),),
+    "title": lambda item: (item.get("title") or "",),
+}
+
+
+class Dataset:
+    """Snapshot imutável de prices.json já parseado.
+
+    Cada requisição pega uma referência ao snapshot atual e trabalha só com
+    ela, então uma recarga no meio do caminho não afeta quem já está
+    respondendo. As respostas já serializadas ficam no próprio snapshot e
+    somem junto com ele quando o arquivo é recarregado.
+    """
+
+    def __init__(self, payload: dict, version: str, loaded_at: float):
+        self.updated_at: Optional[str] = payload.get("updated_at")
+        self.items: List[dict] = payload.get("items", [])
+        self.version = version
+        self.loaded_at = loaded_at
+        self.last_modified = http_date(self.updated_at, loaded_at)
+        self.responses = ResponseCache()
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        # Listas de posições em ordem crescente, montadas uma vez por carga.
+        self.by_game: Dict[str, List[int]] = {}
+        self.by_field: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self.on_sale: List[int] = []
+
+        for position, item in enumerate(self.items):
+            self.by_game.setdefault(item.get("game_id"), []).append(position)
+            for field in INDEXED_FIELDS:
+                self.by_field[field].setdefault(item.get(field), []).append(position)
+            if (item.get("discount_percent") or 0) > 0:
+                self.on_sale.append(position)
+
+        # ordering[key] = posições já ordenadas; rank[key][posição] = lugar
+        # nessa ordem. Arrays de inteiros para não pagar um objeto por entrada.
+        self.ordering: Dict[str, array] = {}
+        self.rank: Dict[str, array] = {}
+        items = self.items
+        for key, sort_key in SORT_KEYS.items():
+            ordering = array("I", sorted(range(len(items)), key=lambda p: (sort_key(items[p]), p)))
+            rank = array("I", bytes(4 * len(items)))
+            for place, position in enumerate(ordering):
+                rank[position] = place
+            self.ordering[key] = ordering
+            self.rank[key] = rank
+
+        # Lista de jogos (primeiro item de cada game_id) já em ordem de título
+        games = {}
+        for item in items:
+            game_id = item.get("game_id")
+            if game_id not in games:
+                games[game_id] = self._game_entry(item)
+        self.games: List[dict] = sorted(games.values(), key=lambda g: g.get("title", ""))
+        self.game_rank: Dict[str, int] = {g["game_id"]: place for place, g in enumerate(self.games)}
+        self.search_index = SearchIndex(self.games)
+
+    @staticmethod
+    def _game_entry(item: dict) -> dict:
+        return {
+            "game_id": item.get("game_id"),
+            "title": item.get("title"),
+            "platform": item.get("platform"),
+        }
+
+    def filter_positions(
+        self,
+        store: Optional[str] = None,
+        region: Optional[str] = None,
+        platform: Optional[str] = None,
+        on_sale: bool = False,
+    ) -> Sequence[int]:
+        """Posições dos itens que passam nos filtros, na ordem original.
+
+        Parte do menor índice envolvido e confere os demais filtros só nos
+        candidatos dele, então o custo acompanha o tamanho do resultado e não
+        o do catálogo.
+        """
+        wanted = {"store": store, "region": region, "platform": platform}
+        candidates = []
+        for field, value in wanted.items():
+            if value:
+                candidates.append((field, self.by_field[field].get(value, [])))
+        if on_sale:
+            candidates.append(("on_sale", self.on_sale))
+
+        if not candidates:
+            return range(len(self.items))
+
+        candidates.sort(key=lambda candidate: len(candidate[1]))
+        (_, positions), rest = candidates[0], candidates[1:]
+        if not rest:
+            return positions
+
+        items = self.items
+        checks = [(field, wanted.get(field)) for field, _ in rest]
+
+        def matches(item: dict) -> bool:
+            for field, value in checks:
+                if field == "on_sale":
+                    if (item.get("discount_percent") or 0) <= 0:
+                        return False
+                elif item.get(field) != value:
+                    return False
+            return True
+
+        return [position for position in positions if matches(items[position])]
+
+    def order(
+        self,
+        positions: Sequence[int],
+        sort: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Sequence[int]:
+        """Ordena e pagina posições usando as ordenações pré-calculadas.
+
+        Sem filtro, a página sai direto da ordenação pronta. Com filtro e
+        limit, só as offset+limit primeiras posições são selecionadas (heap),
+        sem ordenar o resultado inteiro.
+        """
+        end = offset + limit if limit is not None else None
+        if not sort:
+            return positions[offset:end]
+
+        reverse = sort.startswith("-")
+        key = sort.lstrip("-")
+        if key not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+
+        if isinstance(positions, range) and len(positions) == len(self.items):
+            ordering = self.ordering[key]
+            if not reverse:
+                return ordering[offset:end]
+            total = len(ordering)
+            start = total - offset
+            stop = total - end if end is not None and end < total else 0
+            return ordering[max(stop, 0):max(start, 0)][::-1]
+
+        rank = self.rank[key].__getitem__
+        if end is not None and end < len(positions):
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            chosen = select(end, positions, key=rank)
+        else:
+            chosen = sorted(positions, key=rank, reverse=reverse)
+        return chosen[offset:end]
+
+    def games_for(self, positions: Sequence[int]) -> List[dict]:
+        """Jogos distintos das posições (primeira ocorrência), em ordem de título."""
+        if isinstance(positions, range) and len(positions) == len(self.items):
+            return self.games
+        items = self.items
+        games = {}
+        for position in positions:
+            item = items[position]
+            game_id = item.get("game_id")
+            if game_id not in games:
+                games[game_id] = self._game_entry(item)
+        game_rank = self.game_rank
+        return sorted(games.values(), key=lambda g: game_rank[g["game_id"]])
+
+    def filter(self, **filters) -> List[dict]:
+        items = self.items
+        return [items[position] for position in self.filter_positions(**filters)]
+
+    def prices_for(self, game_id: str) -> List[dict]:
+        items = self.items
+        return [items[position] for position in self.by_game.get(game_id, [])]
+
+    def prices_for_many(self, game_ids: List[str]) -> Dict[str, List[dict]]:
+        """Preços agrupados por game_id; ids desconhecidos ficam de fora."""
+        items, by_game = self.items, self.by_game
+        return {
+            game_id: [items[position] for position in by_game[game_id]]
+            for game_id in game_ids
+            if game_id in by_game
+        }
+
+    @classmethod
+    def empty(cls) -> "Dataset":
+        return cls({"updated_at": None, "items": []}, version="empty", loaded_at=time.time())
+
+
+class DatasetCache:
+    """Mantém prices.json em memória e recarrega quando o arquivo muda.
+
+    A cada get() compara (mtime, tamanho) do arquivo; se mudou, relê e
+    confere o hash do conteúdo antes de parsear de novo. Só uma thread
+    recarrega por vez, e as demais seguem com o snapshot anterior em vez de
+    esperar, exceto na primeira carga: sem snapshot ainda, elas esperam em
+    vez de responder uma lista vazia.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._current = Dataset.empty()
+        self._loaded = False
+        self._stat: Optional[Tuple[int, int]] = None
+        # (stat, versão) do último arquivo que não deu para ler/parsear,
+        # para não reler o mesmo arquivo quebrado a cada requisição
+        self._failed: Optional[Tuple[Tuple[int, int], Optional[str]]] = None
+        self._reload_lock = threading.Lock()
+        # Duração da última carga (leitura, hash, parse e índices) e total de cargas
+        self.load_seconds = 0.0
+        self.loads = 0
+
+    def get(self) -> Dataset:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return self._current
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._stat or (self._failed is not None and key == self._failed[0]):
+            return self._current
+
+        if self._reload_lock.acquire(blocking=not self._loaded):
+            try:
+                if key != self._stat:
+                    self._reload(key)
+            finally:
+                self._reload_lock.release()
+        return self._current
+
+    def _reload(self, key: Tuple[int, int]) -> None:
+        started = time.perf_counter()
+        try:
+            raw = self.path.read_bytes()
+        except OSError:
+            self._failed = (key, None)
+            return
+        version = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        if version == self._current.version:
+            self._stat = key
+            return
+        if self._failed is not None and version == self._failed[1]:
+            self._failed = (key, version)
+            return
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            # Arquivo incompleto/corrompido (JSON ou UTF-8 inválido): mantém o
+            # snapshot anterior e só tenta de novo quando o arquivo mudar
+            self._failed = (key, version)
+            return
+        self._current = Dataset(payload, version, time.time())
+        self._loaded = True
+        self._stat = key
+        self._failed = None
+        self.load_seconds = time.perf_counter() - started
+        self.loads += 1
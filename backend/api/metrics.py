@@ -0,0 +1,138 @@
+"""
+Métricas de runtime dos servidores locais no formato texto do Prometheus
+
+Contadores e histogramas ficam em memória, por processo. No modo prefork
+cada processo tem os seus e o /api/metrics responde com os do processo que
+atendeu a requisição.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Limites (segundos) dos buckets de latência, dos sub-ms do cache até
+# respostas grandes sem cache
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{%s}" % pairs
+
+
+def _value(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, object], float]]) -> List[str]:
+    """Linhas HELP/TYPE seguidas das amostras de uma métrica."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {_value(value)}" for labels, value in samples)
+    return lines
+
+
+class RequestMetrics:
+    """Contadores por rota/status e histograma de latência por rota.
+
+    Rotas fora de routes entram como "other" para o número de séries não
+    crescer com URLs arbitrárias.
+    """
+
+    def __init__(self, routes: Iterable[str], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.routes = frozenset(routes)
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, int], int] = {}
+        # rota -> [contagem por bucket (não cumulativa), soma, total]
+        self._latency: Dict[str, list] = {}
+        self._cache = {"hit": 0, "miss": 0}
+
+    def route(self, path: str) -> str:
+        return path if path in self.routes else "other"
+
+    def observe(self, path: str, status: int, seconds: float) -> None:
+        route = self.route(path)
+        with self._lock:
+            self._requests[(route, status)] = self._requests.get((route, status), 0) + 1
+            latency = self._latency.get(route)
+            if latency is None:
+                latency = self._latency[route] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    latency[0][index] += 1
+                    break
+            latency[1] += seconds
+            latency[2] += 1
+
+    def count_cache(self, hit: bool) -> None:
+        with self._lock:
+            self._cache["hit" if hit else "miss"] += 1
+
+    def render(self, extra: Optional[List[str]] = None) -> bytes:
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {route: [list(counts), total, count] for route, (counts, total, count) in self._latency.items()}
+            cache = dict(self._cache)
+
+        lines = metric(
+            "api_requests_total",
+            "counter",
+            "HTTP requests by route and status.",
+            (({"route": route, "status": status}, value) for (route, status), value in sorted(requests.items())),
+        )
+        lines += [
+            "# HELP api_request_duration_seconds Request handling time by route.",
+            "# TYPE api_request_duration_seconds histogram",
+        ]
+        for route, (counts, total, count) in sorted(latency.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"api_request_duration_seconds_bucket{_labels({'route': route, 'le': f'{bound:g}'})} {cumulative}")
+            lines.append(f"api_request_duration_seconds_bucket{_labels({'route': route, 'le': '+Inf'})} {count}")
+            lines.append(f"api_request_duration_seconds_sum{_labels({'route': route})} {total:.6f}")
+            lines.append(f"api_request_duration_seconds_count{_labels({'route': route})} {count}")
+        lines += metric(
+            "api_response_cache_requests_total",
+            "counter",
+            "Response cache lookups by result.",
+            (({"result": result}, value) for result, value in sorted(cache.items())),
+        )
+        lines += metric("api_process_start_time_seconds", "gauge", "Process start time.", [({}, self.started_at)])
+        lines += extra or []
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class MeteredHandler(BaseHTTPRequestHandler):
+    """Base dos handlers que registram status e latência de cada requisição."""
+
+    metrics: RequestMetrics
+    _status = 0
+
+    def send_response(self, code, message=None) -> None:
+        self._status = code
+        super().send_response(code, message)
+
+    def _metered(self, handle) -> None:
+        started = time.perf_counter()
+        try:
+            handle()
+        finally:
+            self.metrics.observe(urlsplit(self.path).path, self._status, time.perf_counter() - started)
+
+    def _send_metrics(self, extra: Optional[List[str]] = None) -> None:
+        body = self.metrics.render(extra)
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
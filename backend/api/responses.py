@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+try:
+    import brotli
+except ImportError:  # opcional; sem ele só gzip é oferecido
+    brotli = None
+
+# Limites do cache por snapshot: consultas com combinações arbitrárias de
+# parâmetros não podem crescer sem fim. O mais antigo sai primeiro (LRU).
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Corpos menores que isso não compensam o custo de comprimir
+MIN_COMPRESS_BYTES = 1024
+
+# Preferência do servidor quando o cliente aceita mais de uma. Como cada
+# variante é comprimida uma vez por versão dos dados, dá para usar níveis
+# altos (brotli 11 seria lento demais para o catálogo inteiro).
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=9)
+    # mtime fixo: a mesma entrada sempre gera os mesmos bytes
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def negotiate(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Escolhe a codificação a partir de Accept-Encoding (None = identity)."""
+    if not accept_encoding or size < MIN_COMPRESS_BYTES:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def cache_key(path: str, query: str) -> str:
+    """Chave normalizada: parâmetros vazios descartados e ordenados."""
+    params = sorted(parse_qsl(query))
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def http_date(updated_at: Optional[str], fallback: float) -> str:
+    """Converte updated_at (ISO 8601) para data HTTP; usa fallback se inválido."""
+    moment = None
+    if updated_at:
+        try:
+            moment = datetime.fromisoformat(updated_at)
+        except ValueError:
+            moment = None
+    if moment is None:
+        moment = datetime.fromtimestamp(fallback, timezone.utc)
+    elif moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+class CachedResponse:
+    """Corpo JSON já serializado, com ETag forte e Last-Modified.
+
+    As variantes comprimidas são geradas na primeira vez que alguém pede
+    cada codificação e reaproveitadas enquanto a entrada estiver no cache.
+    Cada variante tem seu próprio ETag, já que os bytes são outros.
+    """
+
+    __slots__ = ("status", "body", "etag", "last_modified", "_variants")
+
+    def __init__(self, status: int, body: bytes, last_modified: str):
+        self.status = status
+        self.body = body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.last_modified = last_modified
+        self._variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        variant = self._variants.get(encoding)
+        if variant is None:
+            # Duas threads podem comprimir ao mesmo tempo; o resultado é igual
+            variant = self._variants[encoding] = compress(self.body, encoding)
+        return variant
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def not_modified(
+        self,
+        if_none_match: Optional[str],
+        if_modified_since: Optional[str],
+        encoding: Optional[str] = None,
+    ) -> bool:
+        # If-None-Match tem precedência; If-Modified-Since só vale sem ele
+        if if_none_match is not None:
+            etag = self.etag_for(encoding)
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return parsedate_to_datetime(self.last_modified) <= since
+        return False
+
+
+class ResponseCache:
+    """Cache LRU de respostas de um snapshot do dataset.
+
+    Vive dentro do Dataset, então um reload troca o cache inteiro junto com
+    os dados e não há invalidação explícita.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, response: CachedResponse) -> CachedResponse:
+        if len(response.body) > self.max_bytes:
+            return response
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = response
+            self.size += len(response.body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+        return response
+
+
+def send_cached(handler, response: CachedResponse, headers: Iterable[Tuple[str, str]] = ()) -> None:
+    """Escreve a resposta no handler, negociando a codificação e o 304."""
+    encoding = negotiate(handler.headers.get("Accept-Encoding"), len(response.body))
+    etag = response.etag_for(encoding)
+    if response.not_modified(
+        handler.headers.get("If-None-Match"), handler.headers.get("If-Modified-Since"), encoding
+    ):
+        handler.send_response(304)
+        handler.send_header("ETag", etag)
+        handler.send_header("Last-Modified", response.last_modified)
+        handler.send_header("Vary", "Accept-Encoding")
+        for name, value in headers:
+            handler.send_header(name, value)
+        handler.end_headers()
+        return
+    body = response.encoded(encoding)
+    handler.send_response(response.status)
+    handler.send_header("Content-Type", "application/json; charset=utf-8")
+    if encoding:
+        handler.send_header("Content-Encoding", encoding)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.send_header("ETag", etag)
+    handler.send_header("Last-Modified", response.last_modified)
+    handler.send_header("Cache-Control", "no-cache")
+    handler.send_header("Vary", "Accept-Encoding")
+    for name, value in headers:
+        handler.send_header(name, value)
+    handler.end_headers()
+    handler.wfile.write(body)
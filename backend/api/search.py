@@ -0,0 +1,150 @@
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+# Resultados padrão / máximo de /api/search
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Fração mínima de trigramas em comum para a busca aproximada (erros de
+# digitação), usada só quando nenhum título contém todos os termos.
+FUZZY_THRESHOLD = 0.5
+
+_APOSTROPHES = re.compile(r"['’`´]")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Saem antes do NFKD, que transformaria ™ em "tm" e ℠ em "sm"
+_MARKS = re.compile(r"[™®℠©]")
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos, sem ™/®/pontuação.
+
+    >>> normalize_text("Pokémon™ Legends")
+    'pokemon legends'
+    >>> normalize_text("Mario Kart™8 Deluxe ®")
+    'mario kart 8 deluxe'
+    """
+    decomposed = unicodedata.normalize("NFKD", _MARKS.sub(" ", text or ""))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    stripped = _APOSTROPHES.sub("", stripped.lower())
+    return _NON_ALNUM.sub(" ", stripped).strip()
+
+
+def trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """Índice invertido de títulos: trigramas para trechos de palavra e
+    vocabulário ordenado para prefixos curtos (1-2 letras).
+
+    entries são os jogos distintos do snapshot; as listas de postagem
+    guardam a posição em entries.
+    """
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self.texts: List[str] = []
+        self.words: List[Set[str]] = []
+        postings: Dict[str, List[int]] = {}
+        by_word: Dict[str, List[int]] = {}
+
+        for doc, entry in enumerate(entries):
+            text = normalize_text(entry.get("title") or "")
+            words = set(text.split())
+            self.texts.append(text)
+            self.words.append(words)
+            grams = set()
+            for word in words:
+                by_word.setdefault(word, []).append(doc)
+                grams |= trigrams(word)
+            for gram in grams:
+                postings.setdefault(gram, []).append(doc)
+
+        self.postings: Dict[str, array] = {gram: array("I", docs) for gram, docs in postings.items()}
+        self.vocabulary: List[str] = sorted(by_word)
+        self.by_word: Dict[str, array] = {word: array("I", docs) for word, docs in by_word.items()}
+
+    def _docs_for(self, token: str) -> Set[int]:
+        if len(token) < 3:
+            # Prefixo curto: palavras do vocabulário que começam com o token
+            docs: Set[int] = set()
+            vocabulary = self.vocabulary
+            for index in range(bisect_left(vocabulary, token), len(vocabulary)):
+                word = vocabulary[index]
+                if not word.startswith(token):
+                    break
+                docs.update(self.by_word[word])
+            return docs
+
+        # Interseção das postagens, começando pela menor
+        lists = sorted((self.postings.get(gram, ()) for gram in trigrams(token)), key=len)
+        if not lists[0]:
+            return set()
+        docs = set(lists[0])
+        for posting in lists[1:]:
+            docs.intersection_update(posting)
+            if not docs:
+                return docs
+        # Trigramas em comum não garantem o trecho inteiro ("abcbcd" x "abcd")
+        return {doc for doc in docs if any(token in word for word in self.words[doc])}
+
+    def _fuzzy(self, tokens: List[str]) -> Dict[int, float]:
+        grams = set()
+        for token in tokens:
+            grams |= trigrams(token)
+        if not grams:
+            return {}
+        hits: Dict[int, int] = {}
+        for gram in grams:
+            for doc in self.postings.get(gram, ()):
+                hits[doc] = hits.get(doc, 0) + 1
+        return {
+            doc: count / len(grams)
+            for doc, count in hits.items()
+            if count / len(grams) >= FUZZY_THRESHOLD
+        }
+
+    def _score(self, doc: int, query: str, tokens: List[str]) -> float:
+        text, words = self.texts[doc], self.words[doc]
+        score = 0.0
+        if text == query:
+            score += 100
+        elif text.startswith(query):
+            score += 50
+        for token in tokens:
+            if token in words:
+                score += 10
+            elif any(word.startswith(token) for word in words):
+                score += 5
+            else:
+                score += 1
+        return score
+
+    def search(self, query: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[dict]:
+        """Jogos que contêm todos os termos (palavra, prefixo ou trecho),
+        do mais relevante para o menos; se nenhum, os mais parecidos."""
+        normalized = normalize_text(query)
+        tokens = normalized.split()
+        if not tokens:
+            return []
+
+        candidates: Optional[Set[int]] = None
+        for token in sorted(tokens, key=len, reverse=True):
+            docs = self._docs_for(token)
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                break
+
+        if candidates:
+            scored = {doc: self._score(doc, normalized, tokens) for doc in candidates}
+        else:
+            scored = self._fuzzy(tokens)
+
+        texts = self.texts
+        ranked = sorted(scored, key=lambda doc: (-scored[doc], len(texts[doc]), texts[doc]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.entries[doc] for doc in ranked]
@@ -1,19 +1,137 @@
 import argparse
+import base64
+import binascii
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
+# Adiciona o diretório backend ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def _load_prices() -> dict:
-    root = Path(__file__).resolve().parents[1]
-    prices_path = root / "data" / "store" / "prices.json"
-    if not prices_path.exists():
-        return {"updated_at": None, "items": []}
-    return json.loads(prices_path.read_text(encoding="utf-8"))
+from api import search
+from api.dataset import DatasetCache
+from api.metrics import MeteredHandler, RequestMetrics, metric
+from api.responses import CachedResponse, cache_key, send_cached
+from api.serving import add_serving_arguments, serve
 
+PRICES_PATH = Path(__file__).resolve().parents[1] / "data" / "store" / "prices.json"
+
+# Teto de itens por página quando o cliente passa limit
+MAX_PAGE_SIZE = 1000
+
+# Máximo de game_ids numa consulta em lote de /api/prices
+MAX_BATCH_SIZE = 100
+
+# Linhas por bloco enviado em /api/export
+EXPORT_CHUNK_ITEMS = 500
+
+# Tamanho máximo do corpo aceito em POST
+MAX_BODY_BYTES = 64 * 1024
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _encode_cursor(version: str, offset: int) -> str:
+    raw = json.dumps({"v": version, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, version: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+        offset = int(state["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise BadRequest("invalid cursor")
+    # Cursor de outra versão dos dados apontaria para posições que mudaram
+    if state.get("v") != version:
+        raise BadRequest("stale cursor, restart from the first page")
+    return max(offset, 0)
+
+
+def _int_param(params: dict, name: str) -> Optional[int]:
+    value = params.get(name, [None])[0]
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if number < 0:
+        raise BadRequest(f"{name} must be >= 0")
+    return number
+
+
+def _page_params(params: dict, version: str) -> Tuple[int, Optional[int]]:
+    limit = _int_param(params, "limit")
+    if limit is not None:
+        limit = min(limit, MAX_PAGE_SIZE)
+    cursor = params.get("cursor", [None])[0]
+    if cursor:
+        offset = _decode_cursor(cursor, version)
+    else:
+        offset = _int_param(params, "offset") or 0
+    return offset, limit
+
+
+def _filters(params: dict) -> dict:
+    return dict(
+        store=params.get("store", [None])[0],
+        region=params.get("region", [None])[0],
+        platform=params.get("platform", [None])[0],
+        on_sale=params.get("on_sale", [None])[0] in ("1", "true"),
+    )
+
+
+def _game_ids(values: List[str]) -> List[str]:
+    """game_id=a,b,c e/ou game_id repetido, sem duplicatas e na ordem pedida."""
+    game_ids = list(dict.fromkeys(
+        game_id.strip() for value in values for game_id in value.split(",") if game_id.strip()
+    ))
+    if not game_ids:
+        raise BadRequest("game_id is required")
+    if len(game_ids) > MAX_BATCH_SIZE:
+        raise BadRequest(f"at most {MAX_BATCH_SIZE} game_ids per request")
+    return game_ids
+
+
+def _batch_prices(data, game_ids: List[str]) -> dict:
+    games = data.prices_for_many(game_ids)
+    return {"games": games, "missing": [game_id for game_id in game_ids if game_id not in games]}
+
+
+def _fields_param(params: dict) -> Optional[List[str]]:
+    value = params.get("fields", [None])[0]
+    if not value:
+        return None
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def _project(items: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    if not fields:
+        return items
+    return [{field: item.get(field) for field in fields} for item in items]
+
+
+ROUTES = (
+    "/api/health",
+    "/api/offers",
+    "/api/games",
+    "/api/search",
+    "/api/prices",
+    "/api/export",
+    "/api/metrics",
+)
+
+
+class ApiHandler(MeteredHandler):
+    datasets = DatasetCache(PRICES_PATH)
+    metrics = RequestMetrics(ROUTES)
 
-class ApiHandler(BaseHTTPRequestHandler):
     def _send_json(self, status: int, payload: dict) -> None:
         body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
         self.send_response(status)
@@ -23,78 +141,204 @@ class ApiHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
-    def _filter_items(self, items, params):
-        store = params.get("store", [None])[0]
-        region = params.get("region", [None])[0]
-        platform = params.get("platform", [None])[0]
-        on_sale = params.get("on_sale", [None])[0]
-
-        def matches(item):
-            if store and item.get("store") != store:
-                return False
-            if region and item.get("region") != region:
-                return False
-            if platform and item.get("platform") != platform:
-                return False
-            if on_sale in ("1", "true") and item.get("discount_percent", 0) <= 0:
-                return False
-            return True
-
-        return [item for item in items if matches(item)]
+    def _send_cached(self, response: CachedResponse) -> None:
+        send_cached(self, response, [("Access-Control-Allow-Origin", "*")])
+
+    def _filter_items(self, data, params):
+        return data.filter(**_filters(params))
+
+    def _page(self, data, params, items, offset, total):
+        """Monta a resposta paginada; next_cursor só aparece se houver mais."""
+        payload = {"items": _project(items, _fields_param(params)), "total": total}
+        count = len(items)
+        if count and offset + count < total:
+            payload["next_cursor"] = _encode_cursor(data.version, offset + count)
+        return payload
 
     def do_GET(self) -> None:
+        self._metered(self._get)
+
+    def _get(self) -> None:
         parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-        data = _load_prices()
-        items = data.get("items", [])
+        data = self.datasets.get()
 
-        if parsed.path == "/api/health":
-            self._send_json(200, {"status": "ok", "updated_at": data.get("updated_at")})
+        if parsed.path == "/api/metrics":
+            self._send_metrics(self._dataset_metrics(data))
             return
 
-        if parsed.path == "/api/offers":
-            filtered = self._filter_items(items, params)
-            self._send_json(
-                200,
-                {"updated_at": data.get("updated_at"), "items": filtered},
-            )
+        # Respostas 200 são servidas do cache do snapshot; só erros e a
+        # primeira consulta de cada chave passam pelo json.dumps.
+        if parsed.path == "/api/export":
+            self._send_export(data, parse_qs(parsed.query))
             return
 
-        if parsed.path == "/api/games":
-            filtered = self._filter_items(items, params)
-            games = {}
-            for item in filtered:
-                game_id = item.get("game_id")
-                if game_id not in games:
-                    games[game_id] = {
-                        "game_id": game_id,
-                        "title": item.get("title"),
-                        "platform": item.get("platform"),
-                    }
-            game_list = sorted(games.values(), key=lambda g: g.get("title", ""))
-            self._send_json(200, {"items": game_list})
+        key = cache_key(parsed.path, parsed.query)
+        cached = data.responses.get(key)
+        self.metrics.count_cache(cached is not None)
+        if cached is not None:
+            self._send_cached(cached)
+            return
+
+        status, payload = self._route(parsed.path, parse_qs(parsed.query), data)
+        if status != 200:
+            self._send_json(status, payload)
+            return
+        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        self._send_cached(data.responses.put(key, CachedResponse(status, body, data.last_modified)))
+
+    def _send_export(self, data, params) -> None:
+        """Catálogo filtrado em NDJSON, escrito em blocos conforme é serializado.
+
+        Nada do corpo é montado inteiro: cada bloco de EXPORT_CHUNK_ITEMS
+        linhas vai para o socket assim que fica pronto. Clientes HTTP/1.1
+        recebem Transfer-Encoding: chunked; HTTP/1.0 lê até o fechamento.
+        """
+        positions = data.filter_positions(**_filters(params))
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Total-Count", str(len(positions)))
+        self.send_header("Connection", "close")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        items, dumps = data.items, json.dumps
+        try:
+            for start in range(0, len(positions), EXPORT_CHUNK_ITEMS):
+                block = "".join(
+                    dumps(items[position], ensure_ascii=True) + "\n"
+                    for position in positions[start:start + EXPORT_CHUNK_ITEMS]
+                ).encode("utf-8")
+                if chunked:
+                    block = b"%X\r\n%s\r\n" % (len(block), block)
+                self.wfile.write(block)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente desistiu no meio; nada a fazer
             return
 
-        if parsed.path == "/api/prices":
-            game_id = params.get("game_id", [None])[0]
-            if not game_id:
-                self._send_json(400, {"error": "game_id is required"})
-                return
-            filtered = [item for item in items if item.get("game_id") == game_id]
-            self._send_json(200, {"game_id": game_id, "items": filtered})
+    def _dataset_metrics(self, data) -> List[str]:
+        datasets = self.datasets
+        lines = metric(
+            "api_dataset_info",
+            "gauge",
+            "Dataset snapshot being served (version is the content hash).",
+            [({"version": data.version, "updated_at": data.updated_at or ""}, 1)],
+        )
+        lines += metric("api_dataset_items", "gauge", "Price records in the snapshot.", [({}, len(data.items))])
+        lines += metric("api_dataset_loaded_timestamp_seconds", "gauge", "When the snapshot was loaded.", [({}, data.loaded_at)])
+        lines += metric("api_dataset_load_seconds", "gauge", "Duration of the last dataset load.", [({}, datasets.load_seconds)])
+        lines += metric("api_dataset_loads_total", "counter", "Dataset loads since start.", [({}, datasets.loads)])
+        lines += metric("api_response_cache_entries", "gauge", "Cached responses for the snapshot.", [({}, len(data.responses))])
+        lines += metric("api_response_cache_bytes", "gauge", "Bytes of cached response bodies.", [({}, data.responses.size)])
+        return lines
+
+    def do_POST(self) -> None:
+        self._metered(self._post)
+
+    def _post(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path != "/api/prices":
+            self._send_json(404, {"error": "not_found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > 0 else 400, {"error": "invalid request body size"})
             return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            values = body.get("game_ids") if isinstance(body, dict) else None
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise BadRequest('body must be {"game_ids": [...]}')
+            payload = _batch_prices(self.datasets.get(), _game_ids(values))
+        except ValueError as exc:
+            # BadRequest e JSON inválido (JSONDecodeError) caem aqui
+            message = str(exc) if isinstance(exc, BadRequest) else "invalid JSON body"
+            self._send_json(400, {"error": message})
+            return
+        self._send_json(200, payload)
+
+    def do_OPTIONS(self) -> None:
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self.send_header("Access-Control-Max-Age", "86400")
+        self.end_headers()
+
+    def _route(self, path: str, params: dict, data) -> Tuple[int, dict]:
+        if path == "/api/health":
+            return 200, {"status": "ok", "updated_at": data.updated_at}
+
+        try:
+            if path == "/api/offers":
+                offset, limit = _page_params(params, data.version)
+                positions = data.filter_positions(**_filters(params))
+                try:
+                    page = data.order(positions, params.get("sort", [None])[0], offset, limit)
+                except ValueError as exc:
+                    raise BadRequest(str(exc))
+                items = [data.items[position] for position in page]
+                payload = {"updated_at": data.updated_at}
+                payload.update(self._page(data, params, items, offset, len(positions)))
+                return 200, payload
+
+            if path == "/api/games":
+                offset, limit = _page_params(params, data.version)
+                sort = params.get("sort", [None])[0]
+                if sort not in (None, "title", "-title"):
+                    raise BadRequest("sort must be title or -title")
+                game_list = data.games_for(data.filter_positions(**_filters(params)))
+                if sort == "-title":
+                    game_list = game_list[::-1]
+                end = offset + limit if limit is not None else None
+                return 200, self._page(data, params, game_list[offset:end], offset, len(game_list))
+        except BadRequest as exc:
+            return 400, {"error": str(exc)}
+
+        if path == "/api/search":
+            query = params.get("q", [""])[0].strip()
+            if not query:
+                return 400, {"error": "q is required"}
+            try:
+                limit = _int_param(params, "limit")
+            except BadRequest as exc:
+                return 400, {"error": str(exc)}
+            limit = min(limit if limit is not None else search.DEFAULT_LIMIT, search.MAX_LIMIT)
+            items = data.search_index.search(query, limit)
+            return 200, {"query": query, "items": _project(items, _fields_param(params))}
+
+        if path == "/api/prices":
+            values = params.get("game_id", [])
+            if len(values) == 1 and "," not in values[0]:
+                return 200, {"game_id": values[0], "items": data.prices_for(values[0])}
+            try:
+                return 200, _batch_prices(data, _game_ids(values))
+            except BadRequest as exc:
+                return 400, {"error": str(exc)}
 
-        self._send_json(404, {"error": "not_found"})
+        return 404, {"error": "not_found"}
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--port", type=int, default=9000)
+    add_serving_arguments(parser)
     args = parser.parse_args()
 
-    server = HTTPServer(("127.0.0.1", args.port), ApiHandler)
-    print(f"API server running on http://127.0.0.1:{args.port}")
-    server.serve_forever()
+    # Carrega prices.json antes de abrir a porta (no prefork, herdado pelos filhos)
+    ApiHandler.datasets.get()
+    print(f"API server running on http://127.0.0.1:{args.port} ({args.mode})")
+    serve(ApiHandler, "127.0.0.1", args.port, args.mode, args.workers, args.processes)
 
 
 if __name__ == "__main__":
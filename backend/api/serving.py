@@ -0,0 +1,132 @@
+"""
+Modos de execução dos servidores HTTP locais (api/server.py e api.py)
+
+- single: HTTPServer clássico, uma requisição por vez
+- threaded: pool limitado de threads (--workers) por processo
+- prefork: --processes processos, cada um com seu pool de threads, todos
+  escutando a mesma porta via SO_REUSEPORT (Linux/BSD)
+
+SIGINT/SIGTERM encerram de forma graciosa: o servidor para de aceitar
+conexões e as requisições em andamento terminam antes de sair.
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Type
+
+MODES = ("single", "threaded", "prefork")
+DEFAULT_MODE = "threaded"
+DEFAULT_WORKERS = 16
+# Um cliente lento não segura uma thread do pool (nem o shutdown) para sempre
+REQUEST_TIMEOUT = 30
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer que atende cada conexão num pool de threads de tamanho fixo."""
+
+    def __init__(self, server_address, handler_class, workers: int = DEFAULT_WORKERS, reuse_port: bool = False):
+        self.reuse_port = reuse_port
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="http")
+        super().__init__(server_address, handler_class)
+
+    def server_bind(self) -> None:
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        try:
+            request.settimeout(REQUEST_TIMEOUT)
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Espera as requisições em andamento terminarem
+        self._pool.shutdown(wait=True)
+
+
+def add_serving_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--mode", choices=MODES, default=DEFAULT_MODE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads per process.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes in prefork mode.",
+    )
+
+
+def _serve_until_signalled(server: HTTPServer) -> None:
+    def stop(signum, frame) -> None:
+        # shutdown() espera o loop de serve_forever, que roda nesta mesma thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _prefork(make_server: Callable[[], HTTPServer], processes: int) -> None:
+    if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("prefork mode needs fork() and SO_REUSEPORT (Linux/BSD)")
+
+    children = set()
+    for _ in range(max(processes, 1)):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_until_signalled(make_server())
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(signum, frame) -> None:
+        for child in list(children):
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+
+
+def serve(
+    handler_class: Type[BaseHTTPRequestHandler],
+    host: str,
+    port: int,
+    mode: str = DEFAULT_MODE,
+    workers: int = DEFAULT_WORKERS,
+    processes: int = 1,
+) -> None:
+    if mode == "single":
+        _serve_until_signalled(HTTPServer((host, port), handler_class))
+    elif mode == "threaded":
+        _serve_until_signalled(PooledHTTPServer((host, port), handler_class, workers))
+    elif mode == "prefork":
+        _prefork(lambda: PooledHTTPServer((host, port), handler_class, workers, reuse_port=True), processes)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
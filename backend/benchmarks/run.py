@@ -0,0 +1,233 @@
+"""
+Benchmarks offline do pipeline e das APIs com catálogos sintéticos
+Usage: python -m benchmarks.run [--rows 10000 100000] [--bench normalize store] [--compare anterior.json]
+
+Cada benchmark roda uma vez para medir tempo e, se a medição de memória
+estiver ligada, outra vez sob tracemalloc (ou, nos scripts de export, lendo
+o pico de RSS do processo filho). O resultado vai para
+data/benchmarks/<timestamp>.json, num formato estável para comparar execuções.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.synthetic import iter_games, iter_raw_items, write_enriched
+from pipeline.history import wait_for_compaction
+from pipeline.normalize import normalize
+from pipeline.records import PriceRecord
+from pipeline.store import store
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+EXPORT_SCRIPTS = [
+    "update_all_games_4regions.py",
+    "update_all_games_8regions.py",
+    "update_all_games_all_regions.py",
+]
+FILTER_QUERIES = [
+    {"region": ["BR"]},
+    {"on_sale": ["1"]},
+    {"store": ["nintendo"], "region": ["US"], "on_sale": ["1"]},
+    {"region": ["JP"], "platform": ["switch"]},
+]
+
+# Executa o script no filho e imprime o pico de RSS (KB no Linux) na última linha do stderr
+_CHILD_RUNNER = (
+    "import runpy, sys\n"
+    "runpy.run_path(sys.argv[1], run_name='__main__')\n"
+    "try:\n"
+    "    import resource\n"
+    "    sys.stderr.write('\\nmaxrss_kb=%d\\n' % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    "except ImportError:\n"
+    "    pass\n"
+)
+
+
+def _measure(fn: Callable[[], None], memory: bool) -> Dict[str, Optional[float]]:
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def _result(bench: str, rows: int, measured: dict, **extra) -> dict:
+    seconds = measured["seconds"]
+    return {
+        "bench": bench,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "peak_bytes": measured["peak_bytes"],
+        **extra,
+    }
+
+
+def bench_normalize(rows: int, memory: bool) -> List[dict]:
+    def run() -> None:
+        for _ in normalize(iter_raw_items(iter_games(rows))):
+            pass
+
+    return [_result("normalize", rows, _measure(run, memory))]
+
+
+def bench_store(rows: int, memory: bool) -> List[dict]:
+    def run() -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store(normalize(iter_raw_items(iter_games(rows))), Path(tmp))
+            wait_for_compaction()
+
+    return [_result("store", rows, _measure(run, memory))]
+
+
+def bench_filter_items(rows: int, memory: bool) -> List[dict]:
+    from api.dataset import Dataset
+    from api.server import ApiHandler
+
+    # A API trabalha com os dicts lidos de prices.json
+    items = [record.to_dict() for record in normalize(iter_raw_items(iter_games(rows)))]
+    started = time.perf_counter()
+    data = Dataset({"updated_at": None, "items": items}, version="bench", loaded_at=time.time())
+    results = [_result("api.dataset_load", rows, {"seconds": time.perf_counter() - started, "peak_bytes": None})]
+    for params in FILTER_QUERIES:
+        query = "&".join(f"{k}={v[0]}" for k, v in params.items())
+        measured = _measure(lambda: ApiHandler._filter_items(None, data, params), memory)
+        results.append(_result("api.filter_items", rows, measured, query=query))
+    return results
+
+
+def bench_records(rows: int, memory: bool) -> List[dict]:
+    # Memória de manter o catálogo normalizado inteiro carregado:
+    # dicts lidos do JSON (como a API faz hoje) vs. PriceRecord.
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "normalized.ndjson"
+        with path.open("w", encoding="utf-8") as handle:
+            for record in normalize(iter_raw_items(iter_games(rows))):
+                handle.write(json.dumps(record.to_dict()))
+                handle.write("\n")
+
+        def load_dicts() -> None:
+            with path.open(encoding="utf-8") as handle:
+                [json.loads(line) for line in handle]
+
+        def load_records() -> None:
+            with path.open(encoding="utf-8") as handle:
+                [PriceRecord.from_dict(json.loads(line)) for line in handle]
+
+        # Sem o passe de memória não há o que comparar aqui
+        return [
+            _result("records.dict", rows, _measure(load_dicts, True)),
+            _result("records.price_record", rows, _measure(load_records, True)),
+        ]
+
+
+def bench_exports(rows: int, memory: bool) -> List[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp) / "backend"
+        (Path(tmp) / "data").mkdir()
+        write_enriched(workdir / "multi_region_enriched.json", rows)
+
+        for script in EXPORT_SCRIPTS:
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-c", _CHILD_RUNNER, str(BACKEND_DIR / script)],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            seconds = time.perf_counter() - started
+            if completed.returncode != 0:
+                print(f"  {script} failed: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+
+            peak = None
+            if memory:
+                for line in reversed(completed.stderr.splitlines()):
+                    if line.startswith("maxrss_kb="):
+                        peak = int(line.split("=", 1)[1]) * 1024
+                        break
+            results.append(
+                _result(f"export.{script[:-3]}", rows, {"seconds": seconds, "peak_bytes": peak})
+            )
+    return results
+
+
+BENCHES = {
+    "normalize": bench_normalize,
+    "store": bench_store,
+    "filter_items": bench_filter_items,
+    "records": bench_records,
+    "exports": bench_exports,
+}
+
+
+def _result_key(result: dict) -> str:
+    return f"{result['bench']}|{result['rows']}|{result.get('query', '')}"
+
+
+def compare(previous_path: Path, current: dict) -> None:
+    previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    before = {_result_key(r): r for r in previous.get("results", [])}
+    print(f"\nComparison with {previous_path.name}:")
+    for result in current["results"]:
+        old = before.get(_result_key(result))
+        if not old or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        label = f"{result['bench']} rows={result['rows']} {result.get('query', '')}".strip()
+        print(f"  {label:60s} {old['seconds']:.4f}s -> {result['seconds']:.4f}s ({ratio:.2f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline pipeline/API benchmarks")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--bench", nargs="+", choices=sorted(BENCHES), default=sorted(BENCHES))
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory pass.")
+    parser.add_argument("--output-dir", type=Path, default=BACKEND_DIR / "data" / "benchmarks")
+    parser.add_argument("--compare", type=Path, help="Previous result file to diff against.")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    results = []
+    for rows in args.rows:
+        for name in args.bench:
+            print(f"[{name}] rows={rows}...")
+            for result in BENCHES[name](rows, not args.no_memory):
+                print(f"  {result['seconds']:.4f}s {result.get('query', '')}")
+                results.append(result)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = args.output_dir / f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    output_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults: {output_path}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
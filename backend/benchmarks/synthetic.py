@@ -0,0 +1,103 @@
+"""
+Catálogos sintéticos no formato de multi_region_enriched.json
+Gerados de forma determinística (seed) para que execuções sejam comparáveis.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from providers.nintendo_eshop_provider import ESHOP_REGIONS
+
+REGIONS = list(ESHOP_REGIONS)
+
+# Cotações aproximadas para price_brl (só precisam ser plausíveis)
+BRL_RATES = {
+    "USD": 5.0, "CAD": 3.7, "MXN": 0.29, "BRL": 1.0, "ARS": 0.006, "CLP": 0.0055,
+    "COP": 0.0013, "PEN": 1.35, "GBP": 6.3, "EUR": 5.4, "RUB": 0.055, "CHF": 5.7,
+    "SEK": 0.47, "NOK": 0.47, "DKK": 0.72, "PLN": 1.25, "CZK": 0.22, "JPY": 0.034,
+    "AUD": 3.3, "NZD": 3.0, "HKD": 0.64, "KRW": 0.0037, "ZAR": 0.27,
+}
+
+# Preço base em USD convertido para a ordem de grandeza de cada moeda
+USD_SCALE = {currency: 5.0 / rate for currency, rate in BRL_RATES.items()}
+
+_PREFIXES = ["Super", "Pokémon", "The Legend of", "Mario", "Kirby", "Hollow", "Dragon",
+             "Final", "Monster", "Animal", "Fire", "Xenoblade", "Metroid", "Luigi's", "Sonic"]
+_NOUNS = ["Kart", "Quest", "Knight", "Odyssey", "Chronicles", "Party", "Hunter", "Fantasy",
+          "Emblem", "Crossing", "Mansion", "Frontiers", "Dread", "Adventure", "Tactics"]
+_SUFFIXES = ["", "", "", " Deluxe", " Remastered", " HD", "™", "®", " II", " 3", ": Director's Cut"]
+_PRICE_POINTS = [4.99, 9.99, 14.99, 19.99, 29.99, 39.99, 49.99, 59.99, 69.99]
+
+
+def iter_games(rows: int, seed: int = 42) -> Iterator[dict]:
+    """Entrega jogos até somar `rows` linhas de preço no total."""
+    rng = random.Random(seed)
+    produced = 0
+    index = 0
+    while produced < rows:
+        title = f"{rng.choice(_PREFIXES)} {rng.choice(_NOUNS)}{rng.choice(_SUFFIXES)} {index}"
+        nsuid = str(70010000000000 + index)
+        slug = "".join(c if c.isalnum() else "-" for c in title.lower()).strip("-")
+        base_usd = rng.choice(_PRICE_POINTS)
+        on_sale_chance = rng.random() * 0.6
+
+        region_count = min(rng.randint(8, len(REGIONS)), rows - produced)
+        prices = []
+        for region in rng.sample(REGIONS, region_count):
+            currency = ESHOP_REGIONS[region]["currency"]
+            msrp = round(base_usd * USD_SCALE[currency] * rng.uniform(0.85, 1.15), 2)
+            discount = rng.choice([10, 20, 25, 30, 40, 50, 75, 90]) if rng.random() < on_sale_chance else 0
+            sale_price = round(msrp * (100 - discount) / 100, 2)
+            prices.append({
+                "region": region,
+                "currency": currency,
+                "msrp": msrp,
+                "sale_price": sale_price,
+                "discount_percent": discount,
+                "on_sale": discount > 0,
+                "msrp_brl": round(msrp * BRL_RATES[currency], 2),
+                "price_brl": round(sale_price * BRL_RATES[currency], 2),
+            })
+
+        produced += region_count
+        index += 1
+        yield {
+            "title": title,
+            "slug": slug,
+            "nsuid": nsuid,
+            "image": f"https://assets.nintendo.com/image/upload/{nsuid}.jpg",
+            "prices": prices,
+        }
+
+
+def iter_raw_items(games: Iterable[dict]) -> Iterator[dict]:
+    """Achata os jogos no formato de item bruto que os providers entregam ao pipeline."""
+    for game in games:
+        for price in game["prices"]:
+            yield {
+                "title": game["title"],
+                "nsuid": game["nsuid"],
+                "store": "nintendo",
+                "platform": "switch",
+                "region": price["region"],
+                "currency": price["currency"],
+                "msrp": price["msrp"],
+                "sale_price": price["sale_price"] if price["on_sale"] else None,
+                "discount_percent": price["discount_percent"],
+                "url": f"https://www.nintendo.com/store/products/{game['nsuid']}/",
+                "cover_url": game["image"],
+            }
+
+
+def write_enriched(path: Path, rows: int, seed: int = 42) -> Path:
+    """Grava um multi_region_enriched.json sintético sem montar a lista em memória."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("[")
+        for i, game in enumerate(iter_games(rows, seed)):
+            if i:
+                handle.write(",")
+            handle.write(json.dumps(game, ensure_ascii=False))
+        handle.write("]")
+    return path
@@ -3,20 +3,35 @@ Verificar progresso do scraper
 """
 import json
 import os
+from pathlib import Path
+
+from pipeline.checkpoint import read_journal
+from pipeline.ndjson import read_ndjson
+
+# Mesmo diretório de nintendeals_comprehensive_scraper.NOA_CHECKPOINT_DIR
+NOA_CHECKPOINT_DIR = Path(__file__).resolve().parent / 'data' / 'checkpoints' / 'noa_prices'
 
 print("="*60)
 print("PROGRESSO DO SCRAPER MULTI-REGIÃO")
 print("="*60)
 
-# Verificar arquivo de progresso
+# Durante a execução o progresso está nos lotes do checkpoint; o
+# noa_progress_all.json só é escrito quando a fase NoA termina.
 progress_file = 'noa_progress_all.json'
+batches = read_journal(NOA_CHECKPOINT_DIR)
 
-if os.path.exists(progress_file):
+if batches or os.path.exists(progress_file):
     try:
-        with open(progress_file, 'r', encoding='utf-8') as f:
-            progress = json.load(f)
+        if batches:
+            progress = []
+            for entry in sorted(batches.values(), key=lambda e: e['done_at']):
+                progress.extend(read_ndjson(NOA_CHECKPOINT_DIR / entry['file']))
+            print(f"\n[OK] Execução em andamento: {len(batches)} lotes concluídos")
+        else:
+            with open(progress_file, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+            print("\n[OK] Nenhuma execução em andamento; resultado da última execução completa")
 
-        print(f"\n[OK] Arquivo de progresso encontrado!")
         print(f"\nJogos processados: {len(progress)}")
 
         # Contar regiões
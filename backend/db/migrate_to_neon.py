@@ -155,6 +155,27 @@ try:
         total += len(batch)
         print(f"    {total}/{len(prices_data)}...")
 
+    # Rebuild materialized stats for everything just loaded
+    cursor.execute("""
+        INSERT INTO game_price_stats (
+            slug, region_code, min_price_brl, max_price_brl, price_sum, records,
+            first_recorded, last_recorded, current_price_brl, current_since
+        )
+        SELECT s.*
+        FROM (SELECT DISTINCT slug, region_code FROM price_history) k
+        CROSS JOIN LATERAL price_stats_for(k.slug, k.region_code) s
+        ON CONFLICT (slug, region_code) DO UPDATE SET
+            min_price_brl = EXCLUDED.min_price_brl,
+            max_price_brl = EXCLUDED.max_price_brl,
+            price_sum = EXCLUDED.price_sum,
+            records = EXCLUDED.records,
+            first_recorded = EXCLUDED.first_recorded,
+            last_recorded = EXCLUDED.last_recorded,
+            current_price_brl = EXCLUDED.current_price_brl,
+            current_since = EXCLUDED.current_since,
+            updated_at = CURRENT_TIMESTAMP
+    """)
+
     conn.commit()
     print(f"  [OK] {total} prices inserted")
 except Exception as e:
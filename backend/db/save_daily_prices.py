@@ -104,8 +104,92 @@ try:
         )
         total += len(batch)
 
+    # Update game_price_stats for the (slug, region) pairs written above, in
+    # the same transaction so stats never disagree with price_history.
+    # Databases where schema.sql was not re-applied yet don't have the table:
+    # keep saving prices and skip the stats instead of rolling everything back.
+    cursor.execute("""
+        SELECT to_regclass('game_price_stats') IS NOT NULL
+           AND to_regprocedure('price_stats_for(varchar, varchar)') IS NOT NULL
+    """)
+    stats_ready = cursor.fetchone()[0]
+    if stats_ready:
+        cursor.execute("""
+            CREATE TEMP TABLE touched_prices (
+                slug VARCHAR(500),
+                region_code VARCHAR(5),
+                price_brl DECIMAL(10, 2),
+                recorded_at DATE
+            ) ON COMMIT DROP
+        """)
+        execute_values(
+            cursor,
+            "INSERT INTO touched_prices (slug, region_code, price_brl, recorded_at) VALUES %s",
+            [(row[0], row[1], row[5], row[8]) for row in prices_data],
+            template="(%s, %s, %s, %s)"
+        )
+
+        # Pairs without stats yet (new games) or rewritten on a day already
+        # counted (reruns): rebuild those rows from their own history
+        cursor.execute("""
+            INSERT INTO game_price_stats (
+                slug, region_code, min_price_brl, max_price_brl, price_sum, records,
+                first_recorded, last_recorded, current_price_brl, current_since
+            )
+            SELECT s.*
+            FROM (
+                SELECT DISTINCT t.slug, t.region_code
+                FROM touched_prices t
+                LEFT JOIN game_price_stats g
+                    ON g.slug = t.slug AND g.region_code = t.region_code
+                WHERE g.slug IS NULL OR g.last_recorded >= t.recorded_at
+            ) k
+            CROSS JOIN LATERAL price_stats_for(k.slug, k.region_code) s
+            ON CONFLICT (slug, region_code) DO UPDATE SET
+                min_price_brl = EXCLUDED.min_price_brl,
+                max_price_brl = EXCLUDED.max_price_brl,
+                price_sum = EXCLUDED.price_sum,
+                records = EXCLUDED.records,
+                first_recorded = EXCLUDED.first_recorded,
+                last_recorded = EXCLUDED.last_recorded,
+                current_price_brl = EXCLUDED.current_price_brl,
+                current_since = EXCLUDED.current_since,
+                updated_at = CURRENT_TIMESTAMP
+        """)
+        rebuilt = cursor.rowcount
+
+        # Everyone else gained a new day: fold it into the running stats
+        cursor.execute("""
+            INSERT INTO game_price_stats (
+                slug, region_code, min_price_brl, max_price_brl, price_sum, records,
+                first_recorded, last_recorded, current_price_brl, current_since
+            )
+            SELECT slug, region_code, price_brl, price_brl, price_brl, 1,
+                   recorded_at, recorded_at, price_brl, recorded_at
+            FROM touched_prices
+            ON CONFLICT (slug, region_code) DO UPDATE SET
+                min_price_brl = LEAST(game_price_stats.min_price_brl, EXCLUDED.min_price_brl),
+                max_price_brl = GREATEST(game_price_stats.max_price_brl, EXCLUDED.max_price_brl),
+                price_sum = game_price_stats.price_sum + EXCLUDED.price_sum,
+                records = game_price_stats.records + 1,
+                last_recorded = EXCLUDED.last_recorded,
+                current_since = CASE
+                    WHEN game_price_stats.current_price_brl = EXCLUDED.current_price_brl
+                    THEN game_price_stats.current_since
+                    ELSE EXCLUDED.current_since
+                END,
+                current_price_brl = EXCLUDED.current_price_brl,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE game_price_stats.last_recorded < EXCLUDED.last_recorded
+        """)
+        folded = cursor.rowcount
+
     conn.commit()
     print(f"[OK] {total} prices saved")
+    if stats_ready:
+        print(f"[OK] Stats: {folded} updated incrementally, {rebuilt} rebuilt")
+    else:
+        print("[WARN] game_price_stats missing: apply backend/db/schema.sql to enable price stats")
 except Exception as e:
     conn.rollback()
     print(f"[ERROR] Failed: {e}")
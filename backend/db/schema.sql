@@ -50,16 +50,108 @@ CREATE TRIGGER update_game_images_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
--- View for price history with min/max/avg per game
-CREATE OR REPLACE VIEW price_stats AS
+-- Materialized price statistics per (slug, region)
+-- Kept up to date by save_daily_prices.py for the rows it writes, so reading
+-- stats is a primary-key lookup instead of aggregating the whole history.
+CREATE TABLE IF NOT EXISTS game_price_stats (
+    slug VARCHAR(500) NOT NULL,
+    region_code VARCHAR(5) NOT NULL,
+    min_price_brl DECIMAL(10, 2),
+    max_price_brl DECIMAL(10, 2),
+    price_sum DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    records INTEGER NOT NULL DEFAULT 0,
+    avg_price_brl DECIMAL(10, 2) GENERATED ALWAYS AS (price_sum / NULLIF(records, 0)) STORED,
+    first_recorded DATE,
+    last_recorded DATE,
+    current_price_brl DECIMAL(10, 2),
+    current_since DATE,
+    days_at_current_price INTEGER GENERATED ALWAYS AS (last_recorded - current_since + 1) STORED,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (slug, region_code)
+);
+
+-- Stats for one (slug, region) computed from price_history.
+-- Used to (re)build rows: backfill, new games, and same-day reruns where the
+-- incremental update can't tell what the overwritten price was.
+CREATE OR REPLACE FUNCTION price_stats_for(p_slug VARCHAR, p_region VARCHAR)
+RETURNS TABLE (
+    slug VARCHAR,
+    region_code VARCHAR,
+    min_price_brl DECIMAL,
+    max_price_brl DECIMAL,
+    price_sum DECIMAL,
+    records INTEGER,
+    first_recorded DATE,
+    last_recorded DATE,
+    current_price_brl DECIMAL,
+    current_since DATE
+) AS $$
+    SELECT
+        a.slug,
+        a.region_code,
+        a.min_price_brl,
+        a.max_price_brl,
+        a.price_sum,
+        a.records,
+        a.first_recorded,
+        a.last_recorded,
+        cur.price_brl,
+        COALESCE(since.first_at, a.first_recorded)
+    FROM (
+        SELECT
+            h.slug,
+            h.region_code,
+            MIN(h.price_brl) as min_price_brl,
+            MAX(h.price_brl) as max_price_brl,
+            COALESCE(SUM(h.price_brl), 0) as price_sum,
+            COUNT(h.price_brl)::INTEGER as records,
+            MIN(h.recorded_at) as first_recorded,
+            MAX(h.recorded_at) as last_recorded
+        FROM price_history h
+        WHERE h.slug = p_slug AND h.region_code = p_region
+        GROUP BY h.slug, h.region_code
+    ) a
+    CROSS JOIN LATERAL (
+        SELECT h.price_brl
+        FROM price_history h
+        WHERE h.slug = p_slug AND h.region_code = p_region
+        ORDER BY h.recorded_at DESC
+        LIMIT 1
+    ) cur
+    -- First day after the last price different from the current one
+    LEFT JOIN LATERAL (
+        SELECT MIN(h.recorded_at) as first_at
+        FROM price_history h
+        WHERE h.slug = p_slug AND h.region_code = p_region
+          AND h.recorded_at > (
+              SELECT MAX(c.recorded_at)
+              FROM price_history c
+              WHERE c.slug = p_slug AND c.region_code = p_region
+                AND c.price_brl IS DISTINCT FROM cur.price_brl
+          )
+    ) since ON TRUE;
+$$ LANGUAGE sql STABLE;
+
+-- Backfill rows for history that predates the table (no-op once populated)
+INSERT INTO game_price_stats (
+    slug, region_code, min_price_brl, max_price_brl, price_sum, records,
+    first_recorded, last_recorded, current_price_brl, current_since
+)
+SELECT s.*
+FROM (SELECT DISTINCT slug, region_code FROM price_history) k
+CROSS JOIN LATERAL price_stats_for(k.slug, k.region_code) s
+ON CONFLICT (slug, region_code) DO NOTHING;
+
+-- View for price history with min/max/avg per game (reads the materialized table)
+DROP VIEW IF EXISTS price_stats;
+CREATE VIEW price_stats AS
 SELECT
     slug,
     region_code,
-    MIN(price_brl) as min_price_brl,
-    MAX(price_brl) as max_price_brl,
-    AVG(price_brl)::DECIMAL(10,2) as avg_price_brl,
-    MIN(recorded_at) as first_recorded,
-    MAX(recorded_at) as last_recorded,
-    COUNT(*) as total_records
-FROM price_history
-GROUP BY slug, region_code;
+    min_price_brl,
+    max_price_brl,
+    avg_price_brl,
+    first_recorded,
+    last_recorded,
+    records as total_records
+FROM game_price_stats;
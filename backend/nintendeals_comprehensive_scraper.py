@@ -2,99 +2,125 @@
 Comprehensive Multi-Region Scraper usando nintendeals
 Busca preços REAIS (não convertidos) de múltiplas regiões
 """
+import hashlib
 import json
 import time
+from pathlib import Path
+
 from nintendeals import noa, noe
 
+from pipeline.checkpoint import Checkpoint
+
 # Taxas de conversão para BRL (para exibição)
 RATES = {
     'USD': 5.80, 'CAD': 4.20, 'MXN': 0.32, 'BRL': 1.00,
     'EUR': 6.20, 'GBP': 7.20, 'AUD': 3.60, 'JPY': 0.039,
 }
 
-def fetch_noa_prices(games, limit=100):
-    """Buscar preços das Américas (US, CA, MX)"""
-    print("\n" + "="*60)
-    print("FASE 1: Nintendo of America (US, CA, MX)")
-    print("="*60)
+NOA_CHECKPOINT_DIR = Path(__file__).resolve().parent / 'data' / 'checkpoints' / 'noa_prices'
+NOA_CHECKPOINT_MAX_AGE = 7 * 24 * 60 * 60  # a fase NoA leva horas; retomável por uma semana
 
-    all_games = []
-    countries = ['US', 'CA', 'MX']
+def _fetch_noa_game(game, countries):
+    """Busca os preços NoA de um jogo; retorna None se não houver preço"""
+    game_data = {
+        'title': game['title'],
+        'nsuid': game.get('nsuid'),
+        'slug': game.get('slug'),
+        'prices': []
+    }
 
-    # Tentar carregar progresso anterior
-    import os
-    progress_file = 'noa_progress_all.json'
-    start_index = 0
+    # Tentar buscar info do jogo
+    try:
+        # Buscar jogo no NoA
+        search_results = list(noa.search_switch_games(game['title']))
 
-    if os.path.exists(progress_file):
-        try:
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                all_games = json.load(f)
-            start_index = len(all_games)
-            print(f"[OK] Retomando do jogo {start_index}...")
-        except:
-            pass
+        if not search_results:
+            return None
 
-    total = min(len(games), limit)
+        # Pegar primeiro resultado (melhor match)
+        game_obj = search_results[0]
 
-    for i, game in enumerate(games[start_index:limit], start=start_index):
-        if (i + 1) % 50 == 0:
-            print(f"  Progresso: {i+1}/{total} jogos... ({len(all_games)} com preços NoA)")
-            # Salvar progresso a cada 50 jogos
-            with open(progress_file, 'w', encoding='utf-8') as f:
-                json.dump(all_games, f, ensure_ascii=False, indent=2)
-            print(f"    >> Progresso salvo <<")
+        # Buscar preços em cada país
+        for country in countries:
+            try:
+                price_obj = game_obj.price(country=country)
+                if price_obj and price_obj.value > 0:
+                    sale_price = price_obj.sale_value if price_obj.on_sale else price_obj.value
+                    discount = price_obj.sale_discount if price_obj.on_sale else 0
 
-        game_data = {
-            'title': game['title'],
-            'nsuid': game.get('nsuid'),
-            'slug': game.get('slug'),
-            'prices': []
-        }
+                    game_data['prices'].append({
+                        'region': country,
+                        'currency': price_obj.currency,
+                        'msrp': price_obj.value,
+                        'sale_price': sale_price,
+                        'discount_percent': discount,
+                        'msrp_brl': price_obj.value * RATES.get(price_obj.currency, 1),
+                        'price_brl': sale_price * RATES.get(price_obj.currency, 1)
+                    })
 
-        # Tentar buscar info do jogo
-        try:
-            # Buscar jogo no NoA
-            search_results = list(noa.search_switch_games(game['title']))
+                time.sleep(0.3)  # Rate limiting
 
-            if not search_results:
-                continue
+            except Exception:
+                pass
 
-            # Pegar primeiro resultado (melhor match)
-            game_obj = search_results[0]
+    except Exception:
+        pass
 
-            # Buscar preços em cada país
-            for country in countries:
-                try:
-                    price_obj = game_obj.price(country=country)
-                    if price_obj and price_obj.value > 0:
-                        sale_price = price_obj.sale_value if price_obj.on_sale else price_obj.value
-                        discount = price_obj.sale_discount if price_obj.on_sale else 0
+    return game_data if game_data['prices'] else None
 
-                        game_data['prices'].append({
-                            'region': country,
-                            'currency': price_obj.currency,
-                            'msrp': price_obj.value,
-                            'sale_price': sale_price,
-                            'discount_percent': discount,
-                            'msrp_brl': price_obj.value * RATES.get(price_obj.currency, 1),
-                            'price_brl': sale_price * RATES.get(price_obj.currency, 1)
-                        })
 
-                    time.sleep(0.3)  # Rate limiting
+def _games_hash(games):
+    """Hash da identidade (título, nsuid, slug) e da ordem dos jogos"""
+    digest = hashlib.blake2b(digest_size=8)
+    for game in games:
+        identity = [game['title'], game.get('nsuid'), game.get('slug')]
+        digest.update(json.dumps(identity, ensure_ascii=False).encode('utf-8') + b'\n')
+    return digest.hexdigest()
 
-                except Exception:
-                    pass
 
-        except Exception:
-            pass
+def fetch_noa_prices(games, limit=100, batch_size=50):
+    """Buscar preços das Américas (US, CA, MX)"""
+    print("\n" + "="*60)
+    print("FASE 1: Nintendo of America (US, CA, MX)")
+    print("="*60)
 
-        if game_data['prices']:
-            all_games.append(game_data)
+    all_games = []
+    countries = ['US', 'CA', 'MX']
+    total = min(len(games), limit)
 
-    # Salvar progresso final
-    with open(progress_file, 'w', encoding='utf-8') as f:
+    # Cada lote de batch_size jogos concluído fica registrado no checkpoint;
+    # uma execução interrompida retoma do primeiro lote não concluído.
+    # O hash da lista de entrada vai na chave: se a lista mudou, os lotes
+    # antigos não batem mais e o checkpoint é descartado.
+    games_hash = _games_hash(games[:total])
+    checkpoint = Checkpoint(
+        NOA_CHECKPOINT_DIR, max_age_seconds=NOA_CHECKPOINT_MAX_AGE, fingerprint=games_hash
+    )
+    if checkpoint.resumed:
+        print(f"[OK] Retomando: {checkpoint.resumed} lotes já concluídos")
+
+    for start in range(0, total, batch_size):
+        end = min(start + batch_size, total)
+        key = f"noa:{games_hash}:{start}-{end}"
+
+        if checkpoint.is_done(key):
+            all_games.extend(checkpoint.load(key))
+            continue
+
+        batch_games = []
+        for game in games[start:end]:
+            game_data = _fetch_noa_game(game, countries)
+            if game_data:
+                batch_games.append(game_data)
+
+        checkpoint.mark_done(key, batch_games)
+        all_games.extend(batch_games)
+        print(f"  Progresso: {end}/{total} jogos... ({len(all_games)} com preços NoA)")
+
+    # Salvar resultado final (lido por merge_multi_region.py)
+    with open('noa_progress_all.json', 'w', encoding='utf-8') as f:
         json.dump(all_games, f, ensure_ascii=False, indent=2)
+    checkpoint.clear()
 
     print(f"\n  [OK] {len(all_games)} jogos com preços das Américas")
     return all_games
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from pipeline.ndjson import read_ndjson, write_ndjson
+
+DEFAULT_MAX_AGE_SECONDS = 6 * 60 * 60
+
+
+def _fsync_write(path: Path, data: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def key_filename(key: str) -> str:
+    # Nome de arquivo legível e sem colisões para uma chave arbitrária
+    readable = re.sub(r"[^A-Za-z0-9_-]+", "_", key)[:60]
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+    return f"{readable}-{digest}.ndjson"
+
+
+def read_journal(directory: Path) -> Dict[str, dict]:
+    """Unidades concluídas de um checkpoint (chave -> entrada), sem alterá-lo.
+
+    Serve também para acompanhar de fora uma execução em andamento.
+    """
+    done = {}
+    journal_path = directory / "journal.ndjson"
+    if not journal_path.exists():
+        return done
+    with journal_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Linha cortada por uma queda no meio da escrita
+                break
+            done[entry["key"]] = entry
+    return done
+
+
+class Checkpoint:
+    """Registro durável de unidades de trabalho concluídas (regiões, lotes...).
+
+    Cada unidade concluída tem seus itens gravados em um NDJSON próprio e só
+    depois uma linha é acrescentada ao journal.ndjson (com fsync). Se a
+    execução cair, a próxima relê o journal e reaproveita o que já terminou em
+    vez de buscar de novo. Um checkpoint mais velho que max_age_seconds é
+    descartado, para não ressuscitar preços antigos, assim como um gravado
+    com outro fingerprint (ex.: hash da lista de entrada que mudou).
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        fingerprint: Optional[str] = None,
+    ):
+        self.directory = directory
+        self._journal_path = directory / "journal.ndjson"
+        self._meta_path = directory / "meta.json"
+
+        if self._is_stale(max_age_seconds, fingerprint):
+            self.clear()
+        directory.mkdir(parents=True, exist_ok=True)
+        if not self._meta_path.exists():
+            meta = {"started_at": time.time(), "fingerprint": fingerprint}
+            _fsync_write(self._meta_path, json.dumps(meta))
+        self._done: Dict[str, dict] = self._load_journal()
+
+    def _is_stale(self, max_age_seconds: float, fingerprint: Optional[str]) -> bool:
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self.directory.exists()
+        if meta.get("fingerprint") != fingerprint:
+            return True
+        return time.time() - meta.get("started_at", 0) > max_age_seconds
+
+    def _load_journal(self) -> Dict[str, dict]:
+        return read_journal(self.directory)
+
+    @property
+    def resumed(self) -> int:
+        return len(self._done)
+
+    def is_done(self, key: str) -> bool:
+        return key in self._done
+
+    def load(self, key: str) -> Iterator[dict]:
+        return read_ndjson(self.directory / self._done[key]["file"])
+
+    def mark_done(self, key: str, items: Iterable[dict]) -> int:
+        filename = key_filename(key)
+        count = write_ndjson(self.directory / filename, items, fsync=True)
+
+        entry = {"key": key, "file": filename, "count": count, "done_at": time.time()}
+        with self._journal_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._done[key] = entry
+        return count
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._done = {}
@@ -1,22 +1,150 @@
-import json
-from datetime import datetime, timezone
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from providers.nintendo_eshop_provider import get_items
+from pipeline.checkpoint import Checkpoint
+from pipeline.ndjson import tee_ndjson
+from pipeline.refresh import RefreshPlan
+from providers.registry import provider_tasks
 
+# (host, região, fetch) — fetch devolve a lista de itens daquela região.
+Task = Tuple[str, str, Callable[[], List[dict]]]
+# (rótulo, segundos, itens, erro) — chamado ao fim de cada tarefa.
+TaskCallback = Callable[[str, float, int, Optional[str]], None]
 
-def collect(output_dir: Path) -> Path:
-    payload = {
-        "collected_at": datetime.now(timezone.utc).isoformat(),
-        "items": get_items(),
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+# Intervalo mínimo (segundos) entre o início de duas requisições ao mesmo host
+DEFAULT_MIN_INTERVAL = 0.0
+DEFAULT_PROVIDERS = ["nintendo_eshop"]
+
+
+def fan_out(
+    tasks: Iterable[Task],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+    on_task_done: Optional[TaskCallback] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    plan: Optional[RefreshPlan] = None,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+) -> Iterator[dict]:
+    # Executa as tarefas num pool limitado e entrega os itens de cada região
+    # assim que ela termina. Um semáforo por host impede que um único site
+    # receba mais que per_host_limit requisições simultâneas, e duas
+    # requisições ao mesmo host começam com pelo menos min_interval de folga.
+    # Com checkpoint, tarefas concluídas numa execução anterior que caiu são
+    # relidas do disco em vez de buscadas de novo.
+    tasks = list(tasks)
+    if checkpoint is not None:
+        pending = []
+        for task in tasks:
+            if checkpoint.is_done(task[1]):
+                yield from checkpoint.load(task[1])
+            else:
+                pending.append(task)
+        tasks = pending
+
+    # Com plan, só as tarefas vencidas são buscadas; as demais repetem o
+    # último resultado salvo.
+    if plan is not None:
+        pending = []
+        for task in tasks:
+            if plan.should_fetch(task[1]):
+                pending.append(task)
+            elif plan.has_cache(task[1]):
+                yield from plan.replay(task[1])
+            else:
+                print(f"  Skipping {task[1]}: hourly request budget exhausted")
+        tasks = pending
+
+    host_slots: Dict[str, threading.BoundedSemaphore] = {
+        host: threading.BoundedSemaphore(max(per_host_limit, 1)) for host, _, _ in tasks
     }
+    next_start: Dict[str, float] = {host: 0.0 for host in host_slots}
+    next_start_lock = threading.Lock()
+
+    def wait_turn(host: str) -> None:
+        # Reserva o próximo horário livre do host e dorme fora do lock
+        with next_start_lock:
+            now = time.monotonic()
+            start = max(now, next_start[host])
+            next_start[host] = start + min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def run_task(task: Task) -> List[dict]:
+        host, label, fetch = task
+        with host_slots[host]:
+            if min_interval > 0:
+                wait_turn(host)
+            started = time.perf_counter()
+            try:
+                items = fetch()
+            except Exception as e:
+                if on_task_done is not None:
+                    on_task_done(label, time.perf_counter() - started, 0, str(e))
+                raise
+        if on_task_done is not None:
+            on_task_done(label, time.perf_counter() - started, len(items), None)
+        return items
+
+    workers = max(max_workers, 1)
+    remaining = iter(tasks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Só há tarefas submetidas para uma janela de 2x workers: resultados
+        # prontos e ainda não consumidos não se acumulam sem limite, e cada
+        # lista é liberada depois de entregue e gravada no checkpoint.
+        running: Dict[Future, Task] = {}
+        for task in islice(remaining, workers * 2):
+            running[pool.submit(run_task, task)] = task
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                host, label, _ = running.pop(future)
+                for task in islice(remaining, 1):
+                    running[pool.submit(run_task, task)] = task
+                try:
+                    items = future.result()
+                except Exception as e:
+                    print(f"  Error collecting {label} from {host}: {e}")
+                    continue
+                finally:
+                    del future
+                if checkpoint is not None:
+                    checkpoint.mark_done(label, items)
+                if plan is not None:
+                    plan.record(label, items)
+                yield from items
+                del items
+
+def collect(
+    output_dir: Optional[Path] = None,
+    providers: Optional[List[str]] = None,
+    regions: Optional[List[str]] = None,
+    limit_per_region: int = 50,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+    on_task_done: Optional[TaskCallback] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    plan: Optional[RefreshPlan] = None,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+) -> Iterator[dict]:
+    tasks: List[Task] = []
+    for name in providers or DEFAULT_PROVIDERS:
+        for host, label, fetch in provider_tasks(name, regions, limit_per_region):
+            tasks.append((host, f"{name}:{label}", fetch))
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / "latest.json"
-    output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    return output_path
+    items = fan_out(tasks, max_workers, per_host_limit, on_task_done, checkpoint, plan, min_interval)
+    if output_dir is not None:
+        items = tee_ndjson(items, output_dir / "latest.ndjson")
+    return items
 
 
 if __name__ == "__main__":
     root = Path(__file__).resolve().parents[1]
-    collect(root / "data" / "raw")
+    for _ in collect(root / "data" / "raw"):
+        pass
@@ -0,0 +1,19 @@
+import json
+from pathlib import Path
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _load_json(name: str, default: dict) -> dict:
+    config_path = _BACKEND_DIR / name
+    if not config_path.exists():
+        return default
+    return json.loads(config_path.read_text(encoding="utf-8"))
+
+
+def load_config() -> dict:
+    return _load_json("config.json", {"refresh_minutes": 60})
+
+
+def load_eshop_config() -> dict:
+    return _load_json("eshop_config.json", {})
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+# Campos que mudam a cada coleta sem representar mudança de preço.
+_VOLATILE_FIELDS = frozenset({"last_updated", "collected_at"})
+
+
+def fingerprint_key(item: dict) -> str:
+    ident = item.get("nsuid") or item.get("title", "")
+    return f"{item.get('store', 'unknown')}:{ident}:{item.get('region', 'unknown')}"
+
+
+def _store_region(key: str) -> Tuple[str, str]:
+    # O identificador do meio pode conter ":" (títulos); loja e região não
+    return key.split(":", 1)[0], key.rsplit(":", 1)[-1]
+
+
+def fingerprint(item: dict) -> str:
+    stable = {k: v for k, v in item.items() if k not in _VOLATILE_FIELDS}
+    encoded = json.dumps(stable, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class Fingerprints:
+    """Hash do item bruto por (loja, nsuid/título, região) entre execuções."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._previous = self._load()
+        self._current: Dict[str, str] = {}
+        self._seen: Set[Tuple[str, str]] = set()
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return {}
+
+    def changed(self, item: dict) -> bool:
+        key = fingerprint_key(item)
+        digest = fingerprint(item)
+        self._current[key] = digest
+        self._seen.add((item.get("store", "unknown"), item.get("region", "unknown")))
+        return self._previous.get(key) != digest
+
+    def save(self) -> None:
+        # Nas (loja, região) vistas nesta execução só ficam as chaves vistas:
+        # um item que some e volta depois é tratado como novo. Regiões que
+        # não vieram (puladas pelo agendamento ou com falha) mantêm as chaves
+        # anteriores, senão voltariam inteiras como "alteradas".
+        merged = {
+            key: digest
+            for key, digest in self._previous.items()
+            if _store_region(key) not in self._seen
+        }
+        merged.update(self._current)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(merged), encoding="utf-8")
+        os.replace(tmp_path, self.path)
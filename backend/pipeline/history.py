@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_RETENTION = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    seen_at TEXT,
+    price REAL,
+    currency TEXT,
+    discount_percent INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_observations_key ON observations(key, id);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+_INSERT = (
+    "INSERT INTO observations (key, seen_at, price, currency, discount_percent) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+Observation = Tuple[str, Optional[str], Optional[float], Optional[str], int]
+
+_compactions: List[threading.Thread] = []
+_compactions_lock = threading.Lock()
+
+
+def wait_for_compaction(timeout: Optional[float] = None) -> None:
+    """Espera as compactações em segundo plano iniciadas neste processo."""
+    with _compactions_lock:
+        pending = list(_compactions)
+    for thread in pending:
+        thread.join(timeout)
+
+
+def history_key(item: dict) -> str:
+    return f"{item.get('game_id')}:{item.get('store')}:{item.get('region')}"
+
+
+class HistoryStore:
+    """Histórico de preços append-only em SQLite (modo WAL).
+
+    Cada execução do pipeline só insere as observações novas; o corte por
+    chave (retention) é aplicado depois, por compact(), fora do caminho de
+    escrita.
+    """
+
+    def __init__(self, path: Path, retention: int = DEFAULT_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._compaction: Optional[threading.Thread] = None
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._import_legacy_json(path.with_name("history.json"))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_legacy_json(self, legacy_path: Path) -> None:
+        # Migra o antigo history.json uma única vez (quando o banco está vazio).
+        if not legacy_path.exists():
+            return
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM observations LIMIT 1").fetchone():
+                return
+            try:
+                legacy = json.loads(legacy_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                return
+            conn.executemany(
+                _INSERT,
+                (
+                    (key, entry.get("seen_at"), entry.get("price"),
+                     entry.get("currency"), entry.get("discount_percent", 0))
+                    for key, entries in legacy.items()
+                    for entry in entries
+                ),
+            )
+
+    def append(self, rows: Iterable[Observation], batch_size: int = 1000) -> int:
+        count = 0
+        batch: List[Observation] = []
+        with self._connect() as conn:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    conn.executemany(_INSERT, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(_INSERT, batch)
+                count += len(batch)
+        return count
+
+    def read(self, key: str, limit: Optional[int] = None) -> List[dict]:
+        limit = limit or self.retention
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seen_at, price, currency, discount_percent FROM observations "
+                "WHERE key = ? ORDER BY id DESC LIMIT ?",
+                (key, limit),
+            ).fetchall()
+        return [
+            {"seen_at": seen_at, "price": price, "currency": currency, "discount_percent": discount}
+            for seen_at, price, currency, discount in reversed(rows)
+        ]
+
+    def compact(self) -> int:
+        # Só as chaves com observações novas desde a última compactação podem
+        # ter passado do limite; o resto da tabela nem é lido. O id máximo é
+        # fixado antes, para linhas inseridas durante a compactação ficarem
+        # para a próxima.
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'compacted_through'").fetchone()
+            last = row[0] if row else 0
+            newest = conn.execute("SELECT MAX(id) FROM observations").fetchone()[0] or 0
+            if newest <= last:
+                return 0
+            cursor = conn.execute(
+                """
+                DELETE FROM observations WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY key ORDER BY id DESC) AS rn
+                        FROM observations
+                        WHERE key IN (
+                            SELECT DISTINCT key FROM observations WHERE id > ? AND id <= ?
+                        )
+                    ) WHERE rn > ?
+                )
+                """,
+                (last, newest, self.retention),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('compacted_through', ?)",
+                (newest,),
+            )
+            return cursor.rowcount
+
+    def compact_in_background(self) -> threading.Thread:
+        # Thread não-daemon: o processo espera a compactação terminar ao sair,
+        # mas quem chamou store() já pode seguir adiante.
+        if self._compaction is not None and self._compaction.is_alive():
+            return self._compaction
+        self._compaction = threading.Thread(target=self.compact, name="history-compaction")
+        with _compactions_lock:
+            _compactions[:] = [t for t in _compactions if t.is_alive()]
+            _compactions.append(self._compaction)
+        self._compaction.start()
+        return self._compaction
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+from pathlib import Path
+
+
+class RunLock:
+    """Lock de arquivo que impede duas execuções do pipeline ao mesmo tempo.
+
+    O arquivo é criado com O_EXCL; um lock mais velho que stale_seconds (ou
+    de um processo que já morreu) é considerado abandonado e removido.
+    """
+
+    def __init__(self, path: Path, stale_seconds: float = 2 * 60 * 60):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.acquired = False
+
+    def _is_stale(self) -> bool:
+        try:
+            owner = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return True
+        except json.JSONDecodeError:
+            # Outro processo pode ter acabado de criar o arquivo e ainda não escreveu nele
+            try:
+                return time.time() - self.path.stat().st_mtime > 60
+            except FileNotFoundError:
+                return True
+        if time.time() - owner.get("locked_at", 0) > self.stale_seconds:
+            return True
+        if os.name == "posix":
+            try:
+                os.kill(owner.get("pid", 0), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return False
+
+    def acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._is_stale():
+                    return False
+                self.path.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"pid": os.getpid(), "locked_at": time.time()}, handle)
+            self.acquired = True
+            return True
+        return False
+
+    def release(self) -> None:
+        if self.acquired:
+            self.path.unlink(missing_ok=True)
+            self.acquired = False
+
+    def __enter__(self) -> "RunLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,221 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SUMMARY_SIZE = 200
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB nos demais
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemorySampler:
+    """Amostra a memória só nas fronteiras dos estágios (primeiro e último item).
+
+    Amostrar a cada item custaria mais que o próprio estágio. Com trace, o
+    pico do tracemalloc é lido e zerado em cada fronteira e creditado a
+    todos os estágios abertos naquele momento.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.traced_peak = 0
+        self._open: List["StageMeter"] = []
+
+    def _credit_peak(self) -> None:
+        if not self.trace:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        self.traced_peak = max(self.traced_peak, peak)
+        for meter in self._open:
+            meter.traced_peak = max(meter.traced_peak or 0, peak)
+
+    def start(self, meter: "StageMeter") -> None:
+        self._credit_peak()
+        meter.rss_start = _peak_rss_bytes()
+        if self.trace:
+            meter.traced_peak = tracemalloc.get_traced_memory()[0]
+        self._open.append(meter)
+
+    def stop(self, meter: "StageMeter") -> None:
+        self._credit_peak()
+        self._open.remove(meter)
+        rss = _peak_rss_bytes()
+        if rss is not None and meter.rss_start is not None:
+            meter.rss_growth = rss - meter.rss_start
+
+    def peak(self) -> int:
+        """Pico do processo inteiro, apesar dos reset_peak() pelo caminho."""
+        return max(self.traced_peak, tracemalloc.get_traced_memory()[1])
+
+
+class StageMeter:
+    """Mede o tempo gasto dentro de next() de um estágio do stream.
+
+    Como os estágios são geradores encadeados, o tempo medido é inclusivo
+    (contém os estágios anteriores); RunMetrics.finish() desconta o estágio
+    anterior para chegar ao tempo exclusivo. A memória é amostrada entre o
+    primeiro e o último item, então também inclui os estágios anteriores.
+    """
+
+    def __init__(self, name: str, sampler: Optional[MemorySampler] = None):
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+        self.rss_start: Optional[int] = None
+        self.rss_growth: Optional[int] = None
+        self.traced_peak: Optional[int] = None
+        self._sampler = sampler
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        """Para estágios que não são stream (uma chamada só, ex.: store)."""
+        if self._sampler is not None:
+            self._sampler.start(self)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - started
+            if self._sampler is not None:
+                self._sampler.stop(self)
+
+    def wrap(self, items: Iterable[Any]) -> Iterator[Any]:
+        iterator = iter(items)
+        if self._sampler is not None:
+            self._sampler.start(self)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self.seconds += time.perf_counter() - started
+                    return
+                self.seconds += time.perf_counter() - started
+                self.items += 1
+                yield item
+        finally:
+            if self._sampler is not None:
+                self._sampler.stop(self)
+
+
+class RunMetrics:
+    def __init__(self, trace_memory: bool = False):
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._stages: List[StageMeter] = []
+        self._tasks: List[dict] = []
+        self._tasks_lock = threading.Lock()
+        self._outputs: Dict[str, Path] = {}
+        self._trace_memory = trace_memory
+        if trace_memory:
+            tracemalloc.start()
+        self._sampler = MemorySampler(trace_memory)
+
+    def stage(self, name: str) -> StageMeter:
+        meter = StageMeter(name, self._sampler)
+        self._stages.append(meter)
+        return meter
+
+    def record_task(self, label: str, seconds: float, items: int, error: Optional[str] = None) -> None:
+        with self._tasks_lock:
+            self._tasks.append(
+                {
+                    "task": label,
+                    "seconds": round(seconds, 4),
+                    "items": items,
+                    "items_per_sec": round(items / seconds, 1) if seconds > 0 else None,
+                    "error": error,
+                }
+            )
+
+    def record_output(self, name: str, path: Path) -> None:
+        self._outputs[name] = path
+
+    def finish(self) -> dict:
+        total_seconds = time.perf_counter() - self._started
+        stages = []
+        previous_inclusive = 0.0
+        previous_rss: Optional[int] = 0
+        for meter in self._stages:
+            exclusive = max(meter.seconds - previous_inclusive, 0.0)
+            previous_inclusive = meter.seconds
+            stage = {
+                "stage": meter.name,
+                "seconds": round(exclusive, 4),
+                "items": meter.items,
+                "items_per_sec": round(meter.items / exclusive, 1) if exclusive > 0 else None,
+                "rss_growth_bytes": (
+                    max(meter.rss_growth - previous_rss, 0)
+                    if meter.rss_growth is not None and previous_rss is not None
+                    else None
+                ),
+            }
+            previous_rss = meter.rss_growth
+            if meter.traced_peak is not None:
+                stage["tracemalloc_peak_bytes"] = meter.traced_peak
+            stages.append(stage)
+
+        memory = {"peak_rss_bytes": _peak_rss_bytes()}
+        if self._trace_memory:
+            memory["tracemalloc_peak_bytes"] = self._sampler.peak()
+            tracemalloc.stop()
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "seconds": round(total_seconds, 4),
+            "stages": stages,
+            "collect_tasks": sorted(self._tasks, key=lambda t: t["task"]),
+            "bytes_written": {
+                name: path.stat().st_size for name, path in self._outputs.items() if path.exists()
+            },
+            "memory": memory,
+        }
+
+    def write(self, runs_dir: Path, manifest: dict) -> Path:
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        manifest_path = runs_dir / f"{stamp}.json"
+        suffix = 1
+        while manifest_path.exists():
+            # Duas execuções no mesmo segundo não sobrescrevem o manifest
+            suffix += 1
+            manifest_path = runs_dir / f"{stamp}-{suffix}.json"
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        summary_path = runs_dir / "summary.json"
+        try:
+            summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            summary = []
+        summary.append(
+            {
+                "started_at": manifest["started_at"],
+                "seconds": manifest["seconds"],
+                "items": manifest["stages"][-1]["items"] if manifest["stages"] else 0,
+                "stages": {s["stage"]: s["seconds"] for s in manifest["stages"]},
+                "peak_rss_bytes": manifest["memory"].get("peak_rss_bytes"),
+            }
+        )
+        tmp_path = summary_path.with_name(summary_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(summary[-SUMMARY_SIZE:], indent=2), encoding="utf-8")
+        os.replace(tmp_path, summary_path)
+        return manifest_path
@@ -0,0 +1,45 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+def read_ndjson(path: Path) -> Iterator[dict]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def write_ndjson(path: Path, items: Iterable[Any], fsync: bool = False) -> int:
+    # Grava a lista inteira de uma vez, trocando o arquivo por rename atômico;
+    # com fsync, o conteúdo já está no disco quando a função retorna.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    count = 0
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for item in items:
+            handle.write(json.dumps(item, ensure_ascii=False))
+            handle.write("\n")
+            count += 1
+        if fsync:
+            handle.flush()
+            os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+def tee_ndjson(
+    items: Iterable[Any], path: Path, encode: Optional[Callable[[Any], dict]] = None
+) -> Iterator[Any]:
+    # Grava cada item assim que ele passa, sem acumular a lista em memória.
+    # O arquivo final só aparece quando o stream termina (rename atômico).
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for item in items:
+            handle.write(json.dumps(encode(item) if encode else item, ensure_ascii=False))
+            handle.write("\n")
+            yield item
+    os.replace(tmp_path, path)
@@ -1,7 +1,12 @@
 import json
+import os
 import re
-from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from pipeline.fingerprints import Fingerprints
+from pipeline.ndjson import read_ndjson, tee_ndjson
+from pipeline.records import PriceRecord
 
 
 def _slugify(value: str) -> str:
@@ -9,7 +14,7 @@ def _slugify(value: str) -> str:
     return slug or "unknown"
 
 
-def _normalize_item(item: dict) -> dict:
+def _normalize_item(item: dict) -> PriceRecord:
     msrp = item.get("msrp")
     sale_price = item.get("sale_price")
     price = sale_price if sale_price is not None else msrp
@@ -18,36 +23,67 @@ def _normalize_item(item: dict) -> dict:
     if discount == 0 and msrp and sale_price:
         discount = round((1 - (sale_price / msrp)) * 100)
 
-    return {
-        "game_id": _slugify(item.get("title", "")),
-        "title": item.get("title", "Unknown"),
-        "store": item.get("store", "unknown"),
-        "platform": item.get("platform", "unknown"),
-        "region": item.get("region", "unknown"),
-        "currency": item.get("currency", "USD"),
-        "price": price,
-        "msrp": msrp,
-        "discount_percent": discount,
-        "url": item.get("url"),
-        "cover_url": item.get("cover_url"),
-    }
+    return PriceRecord(
+        game_id=_slugify(item.get("title", "")),
+        title=item.get("title", "Unknown"),
+        store=item.get("store", "unknown"),
+        platform=item.get("platform", "unknown"),
+        region=item.get("region", "unknown"),
+        currency=item.get("currency", "USD"),
+        price=price,
+        msrp=msrp,
+        discount_percent=discount,
+        url=item.get("url"),
+        cover_url=item.get("cover_url"),
+    )
+
 
+def _normalize_incremental(
+    items: Iterable[dict], delta_dir: Path, fingerprints: Fingerprints, changes_only: bool
+) -> Iterator[PriceRecord]:
+    # Compara o hash de cada item bruto com o da execução anterior; só os
+    # novos/alterados vão para delta.ndjson. Com changes_only, os itens
+    # inalterados nem são normalizados nem repassados adiante.
+    # fingerprints não é salvo aqui: quem chama salva depois que o store
+    # gravou o histórico, senão uma falha no store perderia as mudanças.
+    delta_path = delta_dir / "delta.ndjson"
+    tmp_path = delta_path.with_name(delta_path.name + ".tmp")
 
-def normalize(raw_path: Path, output_dir: Path) -> Path:
-    raw = json.loads(raw_path.read_text(encoding="utf-8"))
-    items = [_normalize_item(item) for item in raw.get("items", [])]
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("w", encoding="utf-8") as delta:
+        for item in items:
+            if fingerprints.changed(item):
+                normalized = _normalize_item(item)
+                delta.write(json.dumps(normalized.to_dict(), ensure_ascii=False))
+                delta.write("\n")
+            elif changes_only:
+                continue
+            else:
+                normalized = _normalize_item(item)
+            yield normalized
+    os.replace(tmp_path, delta_path)
 
-    payload = {
-        "normalized_at": datetime.now(timezone.utc).isoformat(),
-        "items": items,
-    }
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / "latest.json"
-    output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    return output_path
+def normalize(
+    items: Iterable[dict],
+    output_dir: Optional[Path] = None,
+    delta_dir: Optional[Path] = None,
+    changes_only: bool = False,
+    fingerprints: Optional[Fingerprints] = None,
+) -> Iterator[PriceRecord]:
+    if delta_dir is not None:
+        if fingerprints is None:
+            fingerprints = Fingerprints(delta_dir / "fingerprints.json")
+        normalized = _normalize_incremental(items, delta_dir, fingerprints, changes_only)
+    else:
+        normalized = (_normalize_item(item) for item in items)
+    if output_dir is not None:
+        normalized = tee_ndjson(normalized, output_dir / "latest.ndjson", PriceRecord.to_dict)
+    return normalized
 
 
 if __name__ == "__main__":
     root = Path(__file__).resolve().parents[1]
-    normalize(root / "data" / "raw" / "latest.json", root / "data" / "normalized")
+    raw_items = read_ndjson(root / "data" / "raw" / "latest.ndjson")
+    for _ in normalize(raw_items, root / "data" / "normalized"):
+        pass
@@ -0,0 +1,74 @@
+import sys
+from typing import Optional
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PriceRecord:
+    """Linha de preço normalizada, compacta em memória.
+
+    Usa __slots__ em vez de um dict por item, e store/platform/region/currency
+    são internadas: milhares de linhas da mesma região compartilham a mesma
+    string. to_dict()/from_dict() convertem para o formato JSON de prices.json.
+    """
+
+    __slots__ = (
+        "game_id",
+        "title",
+        "store",
+        "platform",
+        "region",
+        "currency",
+        "price",
+        "msrp",
+        "discount_percent",
+        "url",
+        "cover_url",
+    )
+
+    def __init__(
+        self,
+        game_id: str,
+        title: str,
+        store: str = "unknown",
+        platform: str = "unknown",
+        region: str = "unknown",
+        currency: str = "USD",
+        price: Optional[float] = None,
+        msrp: Optional[float] = None,
+        discount_percent: int = 0,
+        url: Optional[str] = None,
+        cover_url: Optional[str] = None,
+    ):
+        self.game_id = game_id
+        self.title = title
+        self.store = _intern(store)
+        self.platform = _intern(platform)
+        self.region = _intern(region)
+        self.currency = _intern(currency)
+        self.price = price
+        self.msrp = msrp
+        self.discount_percent = discount_percent
+        self.url = url
+        self.cover_url = cover_url
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PriceRecord":
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def get(self, field: str, default=None):
+        # Mesmo acesso que um dict, para o código que lê item.get(...)
+        return getattr(self, field, default) if field in self.__slots__ else default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PriceRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"PriceRecord({self.game_id!r}, region={self.region!r}, price={self.price!r})"
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pipeline.checkpoint import key_filename
+from pipeline.fingerprints import fingerprint
+from pipeline.ndjson import read_ndjson, write_ndjson
+
+DEFAULT_MIN_MINUTES = 15
+DEFAULT_MAX_MINUTES = 6 * 60
+DEFAULT_JITTER = 0.1
+DEFAULT_MAX_REQUESTS_PER_HOUR = 500
+
+
+def _items_hash(items: Iterable[dict]) -> str:
+    digests = sorted(fingerprint(item) for item in items)
+    return hashlib.blake2b("".join(digests).encode("ascii"), digest_size=16).hexdigest()
+
+
+class RefreshPlan:
+    """Agenda de atualização por tarefa de coleta (provider:região).
+
+    Cada tarefa tem seu próprio intervalo: quando os preços mudaram na última
+    busca (ex.: promoção em andamento) o intervalo cai pela metade, até
+    min_minutes; quando nada mudou ele cresce 50%, até max_minutes. O próximo
+    horário recebe um jitter de ±jitter para não alinhar todas as regiões.
+
+    Tarefas que não estão vencidas são servidas a partir do último resultado
+    salvo em cache_dir, então prices.json continua completo mesmo quando só
+    parte das regiões foi buscada. max_requests_per_hour limita o total de
+    buscas numa janela móvel de uma hora.
+    """
+
+    def __init__(
+        self,
+        state_path: Path,
+        cache_dir: Path,
+        base_minutes: float = 60,
+        min_minutes: float = DEFAULT_MIN_MINUTES,
+        max_minutes: float = DEFAULT_MAX_MINUTES,
+        jitter: float = DEFAULT_JITTER,
+        max_requests_per_hour: int = DEFAULT_MAX_REQUESTS_PER_HOUR,
+        only_due: bool = True,
+    ):
+        self.state_path = state_path
+        self.cache_dir = cache_dir
+        self.base_seconds = base_minutes * 60
+        self.min_seconds = min_minutes * 60
+        self.max_seconds = max_minutes * 60
+        self.jitter = jitter
+        self.max_requests_per_hour = max_requests_per_hour
+        self.only_due = only_due
+        self._rng = random.Random()
+
+        state = self._load_state()
+        self._tasks: Dict[str, dict] = state.get("tasks", {})
+        cutoff = time.time() - 3600
+        self._requests: List[float] = [t for t in state.get("requests", []) if t > cutoff]
+
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _cache_path(self, label: str) -> Path:
+        return self.cache_dir / key_filename(label)
+
+    def has_cache(self, label: str) -> bool:
+        return self._cache_path(label).exists()
+
+    def should_fetch(self, label: str) -> bool:
+        """Decide se a tarefa é buscada agora; uma busca aprovada consome orçamento."""
+        now = time.time()
+        task = self._tasks.get(label)
+        due = (
+            not self.only_due
+            or task is None
+            or not self.has_cache(label)
+            or now >= task.get("next_due", 0)
+        )
+        if not due:
+            return False
+        if self.only_due and len(self._requests) >= self.max_requests_per_hour:
+            return False
+        self._requests.append(now)
+        return True
+
+    def replay(self, label: str) -> Iterator[dict]:
+        return read_ndjson(self._cache_path(label))
+
+    def record(self, label: str, items: List[dict]) -> None:
+        now = time.time()
+        digest = _items_hash(items)
+        task = self._tasks.get(label, {"interval": self.base_seconds})
+        changed = task.get("hash") != digest
+
+        if "hash" not in task:
+            interval = task["interval"]
+        elif changed:
+            interval = max(self.min_seconds, task["interval"] / 2)
+        else:
+            interval = min(self.max_seconds, task["interval"] * 1.5)
+
+        spread = interval * self.jitter
+        self._tasks[label] = {
+            "interval": interval,
+            "hash": digest,
+            "last_fetched": now,
+            "last_changed": now if changed else task.get("last_changed"),
+            "next_due": now + interval + self._rng.uniform(-spread, spread),
+        }
+
+        write_ndjson(self._cache_path(label), items)
+
+    def seconds_until_next_due(self, default: Optional[float] = None) -> float:
+        if not self._tasks:
+            return default if default is not None else self.base_seconds
+        next_due = min(task.get("next_due", 0) for task in self._tasks.values())
+        wait = next_due - time.time()
+        if self._requests and len(self._requests) >= self.max_requests_per_hour:
+            # Orçamento esgotado: espera a requisição mais antiga sair da janela
+            wait = max(wait, self._requests[0] + 3600 - time.time())
+        return max(wait, 0.0)
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"tasks": self._tasks, "requests": self._requests}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.state_path)
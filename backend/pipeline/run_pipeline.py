@@ -1,24 +1,173 @@
+import argparse
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Adiciona o diretório pai ao path para imports funcionarem
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from pipeline.collect import collect
+from pipeline.collect import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_PER_HOST_LIMIT,
+    DEFAULT_PROVIDERS,
+    collect,
+)
+from pipeline.checkpoint import DEFAULT_MAX_AGE_SECONDS, Checkpoint
+from pipeline.config import load_config, load_eshop_config
+from pipeline.fingerprints import Fingerprints
+from pipeline.history import DEFAULT_RETENTION
+from pipeline.lock import RunLock
+from pipeline.metrics import RunMetrics
+from pipeline.ndjson import read_ndjson
 from pipeline.normalize import normalize
+from pipeline.refresh import (
+    DEFAULT_JITTER,
+    DEFAULT_MAX_MINUTES,
+    DEFAULT_MAX_REQUESTS_PER_HOUR,
+    DEFAULT_MIN_MINUTES,
+    RefreshPlan,
+)
 from pipeline.store import store
 
 
-def run() -> None:
+def refresh_plan(config: dict, data_dir: Path, only_due: bool = True) -> RefreshPlan:
+    adaptive = config.get("adaptive_refresh", {})
+    return RefreshPlan(
+        data_dir / "refresh_state.json",
+        data_dir / "store" / "tasks",
+        base_minutes=float(config.get("refresh_minutes", 60)),
+        min_minutes=float(adaptive.get("min_minutes", DEFAULT_MIN_MINUTES)),
+        max_minutes=float(adaptive.get("max_minutes", DEFAULT_MAX_MINUTES)),
+        jitter=float(adaptive.get("jitter", DEFAULT_JITTER)),
+        max_requests_per_hour=int(adaptive.get("max_requests_per_hour", DEFAULT_MAX_REQUESTS_PER_HOUR)),
+        only_due=only_due,
+    )
+
+
+def run(
+    write_intermediates: bool = False,
+    trace_memory: bool = False,
+    resume: bool = True,
+    only_due: bool = False,
+) -> Optional[Path]:
     root = Path(__file__).resolve().parents[1]
+    with RunLock(root / "data" / "pipeline.lock") as lock:
+        if not lock.acquired:
+            print("Another pipeline run is in progress; skipping.")
+            return None
+        return _run(root, write_intermediates, trace_memory, resume, only_due)
+
+
+def _run(
+    root: Path, write_intermediates: bool, trace_memory: bool, resume: bool, only_due: bool
+) -> Path:
     raw_dir = root / "data" / "raw"
     normalized_dir = root / "data" / "normalized"
     store_dir = root / "data" / "store"
+    metrics = RunMetrics(trace_memory=trace_memory)
+    config = load_config()
+    eshop_config = load_eshop_config()
+    scraping = eshop_config.get("scraping", {})
+    region_sets = eshop_config.get("regions", {})
+    regions = region_sets.get("all" if scraping.get("use_all_regions") else "priority")
+
+    # Regiões já concluídas por uma execução que caiu ou estourou o tempo
+    # são reaproveitadas; o checkpoint é apagado quando a execução termina.
+    # Sem resume, idade máxima 0 descarta qualquer checkpoint existente.
+    max_age_minutes = float(config.get("checkpoint_max_age_minutes", DEFAULT_MAX_AGE_SECONDS / 60))
+    checkpoint = Checkpoint(
+        root / "data" / "checkpoints" / "pipeline",
+        max_age_seconds=max_age_minutes * 60 if resume else 0,
+    )
+    if checkpoint.resumed:
+        print(f"Resuming run: {checkpoint.resumed} collect tasks already done")
+
+    # Com only_due, só as regiões vencidas na agenda adaptativa são buscadas.
+    plan = refresh_plan(config, root / "data", only_due=only_due)
+
+    # Os estágios são geradores encadeados: cada item atravessa
+    # collect -> normalize -> store sem materializar o catálogo inteiro.
+    # Com write_intermediates, raw/ e normalized/ recebem NDJSON incremental.
+    # normalized/delta.ndjson sempre recebe só os itens novos ou alterados,
+    # e é dele que o histórico é alimentado.
+    items = collect(
+        raw_dir if write_intermediates else None,
+        providers=config.get("providers", DEFAULT_PROVIDERS),
+        regions=regions,
+        limit_per_region=int(scraping.get("limit_per_region", 50)),
+        max_workers=int(scraping.get("max_workers", DEFAULT_MAX_WORKERS)),
+        per_host_limit=int(scraping.get("per_host_concurrency", DEFAULT_PER_HOST_LIMIT)),
+        min_interval=float(scraping.get("rate_limit_delay", DEFAULT_MIN_INTERVAL)),
+        on_task_done=metrics.record_task,
+        checkpoint=checkpoint,
+        plan=plan,
+    )
+    items = metrics.stage("collect").wrap(items)
+    fingerprints = Fingerprints(normalized_dir / "fingerprints.json")
+    items = normalize(
+        items,
+        normalized_dir if write_intermediates else None,
+        delta_dir=normalized_dir,
+        fingerprints=fingerprints,
+    )
+    items = metrics.stage("normalize").wrap(items)
+
+    store_meter = metrics.stage("store")
+    with store_meter.measure():
+        store_meter.items = store(
+            items,
+            store_dir,
+            history_retention=int(config.get("history_retention", DEFAULT_RETENTION)),
+            history_items=read_ndjson(normalized_dir / "delta.ndjson"),
+        )
+    # Só agora o histórico tem as mudanças; se o store falhar, a próxima
+    # execução ainda as vê como alteradas
+    fingerprints.save()
+    checkpoint.clear()
+    plan.save()
+
+    metrics.record_output("prices.json", store_dir / "prices.json")
+    metrics.record_output("history.db", store_dir / "history.db")
+    metrics.record_output("delta.ndjson", normalized_dir / "delta.ndjson")
+    if write_intermediates:
+        metrics.record_output("raw.ndjson", raw_dir / "latest.ndjson")
+        metrics.record_output("normalized.ndjson", normalized_dir / "latest.ndjson")
+    return metrics.write(root / "data" / "runs", metrics.finish())
+
 
-    raw_path = collect(raw_dir)
-    normalized_path = normalize(raw_path, normalized_dir)
-    store(normalized_path, store_dir)
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--write-intermediates",
+        action="store_true",
+        help="Write data/raw and data/normalized NDJSON snapshots.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the tracemalloc peak in the run manifest (slower).",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted run and collect everything again.",
+    )
+    parser.add_argument(
+        "--only-due",
+        action="store_true",
+        help="Fetch only the regions due in the adaptive refresh schedule.",
+    )
+    args = parser.parse_args()
+    manifest_path = run(
+        write_intermediates=args.write_intermediates,
+        trace_memory=args.trace_memory,
+        resume=not args.fresh,
+        only_due=args.only_due,
+    )
+    if manifest_path is not None:
+        print(f"Run manifest: {manifest_path}")
 
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -1,48 +1,72 @@
 import json
+import os
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
+from pipeline.history import DEFAULT_RETENTION, HistoryStore, Observation, history_key
+from pipeline.ndjson import read_ndjson
+from pipeline.records import PriceRecord
 
-def _load_history(path: Path) -> dict:
-    if not path.exists():
-        return {}
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return {}
 
+def _write_prices(
+    items: Iterable[PriceRecord], prices_path: Path, updated_at: str
+) -> Iterator[PriceRecord]:
+    # prices.json mantém o formato {"updated_at", "items": [...]} lido pela API,
+    # mas é escrito item a item para não montar o payload inteiro em memória.
+    tmp_path = prices_path.with_name(prices_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write('{"updated_at": %s, "items": [' % json.dumps(updated_at))
+        first = True
+        for item in items:
+            if not first:
+                handle.write(",")
+            handle.write("\n  ")
+            handle.write(json.dumps(item.to_dict()))
+            first = False
+            yield item
+        handle.write("\n]}\n")
+    os.replace(tmp_path, prices_path)
 
-def store(normalized_path: Path, store_dir: Path) -> None:
-    normalized = json.loads(normalized_path.read_text(encoding="utf-8"))
-    items = normalized.get("items", [])
-    updated_at = normalized.get("normalized_at")
 
-    store_dir.mkdir(parents=True, exist_ok=True)
-    prices_path = store_dir / "prices.json"
-    history_path = store_dir / "history.json"
-
-    prices_payload = {
-        "updated_at": updated_at,
-        "items": items,
-    }
-    prices_path.write_text(json.dumps(prices_payload, indent=2), encoding="utf-8")
-
-    history = _load_history(history_path)
+def _observations(items: Iterable, seen_at: str) -> Iterator[Observation]:
+    # Aceita PriceRecord ou dict (ex.: delta.ndjson lido do disco)
     for item in items:
-        key = f"{item.get('game_id')}:{item.get('store')}:{item.get('region')}"
-        history.setdefault(key, [])
-        history[key].append(
-            {
-                "seen_at": updated_at,
-                "price": item.get("price"),
-                "currency": item.get("currency"),
-                "discount_percent": item.get("discount_percent", 0),
-            }
+        yield (
+            history_key(item),
+            seen_at,
+            item.get("price"),
+            item.get("currency"),
+            item.get("discount_percent", 0),
         )
-        history[key] = history[key][-50:]
 
-    history_path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+def store(
+    items: Iterable[PriceRecord],
+    store_dir: Path,
+    updated_at: Optional[str] = None,
+    history_retention: int = DEFAULT_RETENTION,
+    history_items: Optional[Iterable[dict]] = None,
+) -> int:
+    if updated_at is None:
+        updated_at = datetime.now(timezone.utc).isoformat()
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    history = HistoryStore(store_dir / "history.db", retention=history_retention)
+
+    written = _write_prices(items, store_dir / "prices.json", updated_at)
+    if history_items is None:
+        count = history.append(_observations(written, updated_at))
+    else:
+        # Histórico só das mudanças (ex.: delta.ndjson do normalize), lido
+        # depois que prices.json terminou de ser gravado.
+        count = sum(1 for _ in written)
+        history.append(_observations(history_items, updated_at))
+    history.compact_in_background()
+    return count
 
 
 if __name__ == "__main__":
     root = Path(__file__).resolve().parents[1]
-    store(root / "data" / "normalized" / "latest.json", root / "data" / "store")
+    normalized = read_ndjson(root / "data" / "normalized" / "latest.ndjson")
+    store(map(PriceRecord.from_dict, normalized), root / "data" / "store")
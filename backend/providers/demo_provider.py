@@ -1,4 +1,5 @@
-def get_items():
+def get_items(regions=None, limit_per_region=None):
+    # Dados fixos: os argumentos existem só para seguir a assinatura dos providers
     return [
         {
             "title": "Mario + Rabbids Sparks of Hope",
@@ -4,12 +4,16 @@ Uses public Nintendo APIs and alternative data sources
 """
 import json
 import time
-from typing import List, Dict, Optional
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.request import Request, urlopen
 from urllib.parse import urlencode, quote
 from datetime import datetime
 
 
+# Host consultado por este provider (usado para limitar concorrência no collect)
+ESHOP_HOST = "www.nintendo.com"
+
 # Mapeamento de países/regiões da Nintendo eShop
 ESHOP_REGIONS = {
     # Americas
@@ -199,21 +203,25 @@ class NintendoEshopScraper:
         print(f"  Scraped {len(items)} items from {region}")
         return items
 
-    def scrape_all_regions(self, query: str = "", limit_per_region: int = 50) -> List[Dict]:
-        """Scrape todas as regiões configuradas"""
-        all_items = []
+    def iter_all_regions(self, query: str = "", limit_per_region: int = 50) -> Iterator[Dict]:
+        """Scrape todas as regiões configuradas, entregando os itens conforme chegam"""
+        total = 0
 
         print(f"Starting scrape for {len(self.regions)} regions...")
         for i, region in enumerate(self.regions, 1):
             print(f"[{i}/{len(self.regions)}] ", end="")
-            items = self.scrape_region(region, query, limit_per_region)
-            all_items.extend(items)
+            for item in self.scrape_region(region, query, limit_per_region):
+                total += 1
+                yield item
 
             if i < len(self.regions):
                 time.sleep(self.rate_limit_delay)
 
-        print(f"\nTotal items scraped: {len(all_items)}")
-        return all_items
+        print(f"\nTotal items scraped: {total}")
+
+    def scrape_all_regions(self, query: str = "", limit_per_region: int = 50) -> List[Dict]:
+        """Scrape todas as regiões configuradas"""
+        return list(self.iter_all_regions(query, limit_per_region))
 
 
 def get_items(regions: Optional[List[str]] = None, limit_per_region: int = 50) -> List[Dict]:
@@ -240,11 +248,33 @@ def get_items(regions: Optional[List[str]] = None, limit_per_region: int = 50) -
     Returns:
         Lista de dicionários com dados dos jogos
     """
+    return list(iter_items(regions, limit_per_region))
+
+
+def iter_items(regions: Optional[List[str]] = None, limit_per_region: int = 50) -> Iterator[Dict]:
+    """Versão em streaming de get_items: entrega um item por vez para o pipeline"""
     if regions is None:
         regions = ["US", "BR", "GB", "JP", "DE", "FR", "MX", "AU"]
 
     scraper = NintendoEshopScraper(regions=regions, rate_limit_delay=0.5)
-    return scraper.scrape_all_regions(limit_per_region=limit_per_region)
+    yield from scraper.iter_all_regions(limit_per_region=limit_per_region)
+
+
+def region_tasks(
+    regions: Optional[List[str]] = None, limit_per_region: int = 50
+) -> List[Tuple[str, str, Callable[[], List[Dict]]]]:
+    """
+    Uma tarefa (host, região, fetch) por região, para o collect executar em paralelo.
+    O espaçamento entre requisições fica a cargo do limite por host do collect.
+    """
+    if regions is None:
+        regions = ["US", "BR", "GB", "JP", "DE", "FR", "MX", "AU"]
+
+    scraper = NintendoEshopScraper(regions=regions, rate_limit_delay=0)
+    return [
+        (ESHOP_HOST, region, partial(scraper.scrape_region, region, "", limit_per_region))
+        for region in regions
+    ]
 
 
 if __name__ == "__main__":
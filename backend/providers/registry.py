@@ -0,0 +1,50 @@
+"""
+Registro de providers por nome
+Os módulos só são importados no primeiro uso, então dependências pesadas ou
+opcionais (nintendeals, requests, bs4, a base estática do extended_data) não
+pesam em quem não usa aquele provider.
+"""
+import importlib
+import threading
+from functools import partial
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+# nome -> (módulo, host consultado)
+PROVIDERS: Dict[str, Tuple[str, str]] = {
+    "demo": ("providers.demo_provider", "demo"),
+    "nintendo_eshop": ("providers.nintendo_eshop_provider", "www.nintendo.com"),
+    "nintendo_real": ("providers.nintendo_real_scraper", "api.ec.nintendo.com"),
+    "nintendo_hybrid": ("providers.nintendo_hybrid_provider", "api.ec.nintendo.com"),
+}
+
+_loaded: Dict[str, ModuleType] = {}
+_lock = threading.Lock()
+
+
+def get_provider(name: str) -> ModuleType:
+    if name not in PROVIDERS:
+        raise KeyError(f"Unknown provider: {name} (available: {', '.join(sorted(PROVIDERS))})")
+    module = _loaded.get(name)
+    if module is None:
+        with _lock:
+            module = _loaded.get(name)
+            if module is None:
+                module = importlib.import_module(PROVIDERS[name][0])
+                _loaded[name] = module
+    return module
+
+
+def provider_tasks(
+    name: str, regions: Optional[List[str]] = None, limit_per_region: int = 50
+) -> List[Tuple[str, str, Callable[[], List[Dict]]]]:
+    """
+    Tarefas (host, rótulo, fetch) de um provider para o collect.
+    Providers com region_tasks são divididos por região; os demais viram uma
+    única tarefa que chama get_items.
+    """
+    module = get_provider(name)
+    if hasattr(module, "region_tasks"):
+        return module.region_tasks(regions, limit_per_region)
+    host = PROVIDERS[name][1]
+    return [(host, name, partial(module.get_items, regions, limit_per_region))]
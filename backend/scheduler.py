@@ -1,34 +1,39 @@
 import argparse
-import json
 import time
 from pathlib import Path
 
-from pipeline.run_pipeline import run
+from pipeline.config import load_config
+from pipeline.run_pipeline import refresh_plan, run
 
-
-def load_config() -> dict:
-    config_path = Path(__file__).resolve().parent / "config.json"
-    if not config_path.exists():
-        return {"refresh_minutes": 60}
-    return json.loads(config_path.read_text(encoding="utf-8"))
+MIN_SLEEP_SECONDS = 60
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--once", action="store_true", help="Run a single cycle.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Refresh every region instead of only the ones due in the adaptive schedule.",
+    )
     args = parser.parse_args()
 
     config = load_config()
     refresh_minutes = int(config.get("refresh_minutes", 60))
     refresh_seconds = max(refresh_minutes, 1) * 60
+    data_dir = Path(__file__).resolve().parent / "data"
 
     if args.once:
-        run()
+        run(only_due=not args.full)
         return
 
+    # Cada região tem o próprio vencimento (ver pipeline/refresh.py); o loop
+    # dorme até a próxima vencer, nunca mais que refresh_minutes. Os horários
+    # são absolutos, então uma execução lenta não empurra a agenda.
     while True:
-        run()
-        time.sleep(refresh_seconds)
+        run(only_due=not args.full)
+        wait = refresh_plan(config, data_dir).seconds_until_next_due(default=refresh_seconds)
+        time.sleep(min(max(wait, MIN_SLEEP_SECONDS), refresh_seconds))
 
 
 if __name__ == "__main__":